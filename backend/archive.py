@@ -0,0 +1,48 @@
+"""Moving documents from a hot collection into its archive collection.
+
+Archiving is done in two passes so that every document is always readable
+from at least one side: copy_documents() copies the matching documents into
+the archive in _id order, keeping their _id, and delete_archived() then
+removes from the source only those documents whose _id is already in the
+archive. Both passes work in batches and can be re-run after an interruption:
+documents copied by an earlier run are skipped as duplicates.
+"""
+from typing import Any, Dict
+
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+
+async def copy_documents(source, target, query: Dict[str, Any], batch_size: int = 1000) -> int:
+    copied = 0
+    last_id = None
+    while True:
+        page = query if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+        batch = await source.find(page).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return copied
+        try:
+            result = await target.insert_many(batch, ordered=False)
+            copied += len(result.inserted_ids)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+            copied += exc.details.get("nInserted", 0)
+        last_id = batch[-1]["_id"]
+
+
+async def delete_archived(source, target, query: Dict[str, Any], batch_size: int = 1000) -> int:
+    deleted = 0
+    last_id = None
+    while True:
+        page = query if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+        ids = [doc["_id"] async for doc in source.find(page, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not ids:
+            return deleted
+        archived = [doc["_id"] async for doc in target.find({"_id": {"$in": ids}}, {"_id": 1})]
+        if archived:
+            result = await source.delete_many({"_id": {"$in": archived}})
+            deleted += result.deleted_count
+        last_id = ids[-1]
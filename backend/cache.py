@@ -0,0 +1,169 @@
+"""Read-through cache for single-entity lookups.
+
+EntityCache sits in front of a loader coroutine and stores documents per
+entity kind with their own TTL. MemoryCache is the default backend: an
+in-process LRU bounded by entry count. RedisCache shares entries, and so
+invalidations, between workers; it needs the optional ``redis`` package.
+With a ``namespace`` callable, keys are prefixed with what it returns (the
+current club when serving several), so one bounded backend serves them all.
+
+Invalidating stores a short-lived tombstone rather than deleting the key, and
+a miss only fills the key if it still holds what the miss saw (set_if). A
+load that raced with a write therefore cannot put the old document back
+after the write invalidated it, in this worker or, with Redis, any other.
+"""
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import bson
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _live(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._live(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def set_if(self, key: str, expected: Optional[Any], value: Any, ttl: float) -> bool:
+        if self._live(key) != expected:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+class RedisCache:
+    # SET only if the key still holds ARGV[1] (an encoded value).
+    SET_IF_EQUAL = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+    end
+    return false
+    """
+
+    def __init__(self, url: str, prefix: str = "sports_club:cache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed") from exc
+        self.prefix = prefix
+        self.evictions = 0
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(self.prefix + key)
+        # Documents round-trip through BSON so datetimes come back as datetimes.
+        return bson.decode(raw)["v"] if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._redis.set(self.prefix + key, bson.encode({"v": value}), px=int(ttl * 1000))
+
+    async def set_if(self, key: str, expected: Optional[Any], value: Any, ttl: float) -> bool:
+        payload, px = bson.encode({"v": value}), int(ttl * 1000)
+        if expected is None:
+            return bool(await self._redis.set(self.prefix + key, payload, px=px, nx=True))
+        return bool(await self._redis.eval(self.SET_IF_EQUAL, 1, self.prefix + key, bson.encode({"v": expected}), payload, px))
+
+    async def delete(self, key: str):
+        await self._redis.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+TOMBSTONE = "$invalidated"
+
+
+class EntityCache:
+    def __init__(
+        self,
+        backend,
+        ttls: Dict[str, float],
+        default_ttl: float = 60.0,
+        namespace: Optional[Callable[[], Optional[str]]] = None,
+        tombstone_ttl: float = 30.0,
+    ):
+        self.backend = backend
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.namespace = namespace
+        # Should outlast any load; a tombstone that expires mid-load still
+        # blocks the fill, since the key no longer holds it.
+        self.tombstone_ttl = tombstone_ttl
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def key(self, kind: str, entity_id: str) -> str:
+        namespace = self.namespace() if self.namespace else None
+        return f"{namespace}/{kind}:{entity_id}" if namespace else f"{kind}:{entity_id}"
+
+    async def get_or_load(self, kind: str, entity_id: str, loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        key = self.key(kind, entity_id)
+        cached = await self.backend.get(key)
+        if cached is not None and TOMBSTONE not in cached:
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+            return cached
+        self.misses[kind] = self.misses.get(kind, 0) + 1
+        value = await loader()
+        if value is not None:
+            await self.backend.set_if(key, cached, value, self.ttls.get(kind, self.default_ttl))
+        return value
+
+    async def invalidate(self, kind: str, entity_id: str):
+        await self.backend.set(self.key(kind, entity_id), {TOMBSTONE: uuid.uuid4().hex}, self.tombstone_ttl)
+
+    async def clear(self):
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        kinds = sorted(set(self.hits) | set(self.misses) | set(self.ttls))
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "evictions": self.backend.evictions,
+            "kinds": {
+                kind: {
+                    "hits": self.hits.get(kind, 0),
+                    "misses": self.misses.get(kind, 0),
+                    "ttl": self.ttls.get(kind, self.default_ttl),
+                }
+                for kind in kinds
+            },
+        }
@@ -0,0 +1,83 @@
+"""Minimal RFC 5545 writer for the fixture and event feeds.
+
+Times are written as floating local times because the API stores naive
+datetimes; DTSTAMP is the one property that must be UTC.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> bytes:
+    """Encode one content line, folding it at 75 octets without splitting characters."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return raw + b"\r\n"
+    parts, current, limit = [], b"", 75
+    for char in line:
+        encoded = char.encode("utf-8")
+        if len(current) + len(encoded) > limit:
+            parts.append(current)
+            current, limit = b"", 74
+        current += encoded
+    parts.append(current)
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def format_local(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def format_utc(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def calendar_header(name: str) -> bytes:
+    return b"".join(fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Sports Club//Sports Club API//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+    ))
+
+
+def vevent(
+    uid: str,
+    start: datetime,
+    end: datetime,
+    summary: str,
+    stamp: datetime,
+    sequence: int = 0,
+    location: Optional[str] = None,
+    description: Optional[str] = None,
+    status: str = "CONFIRMED",
+) -> bytes:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{format_utc(stamp)}",
+        f"DTSTART:{format_local(start)}",
+        f"DTEND:{format_local(end)}",
+        f"SEQUENCE:{sequence}",
+        f"STATUS:{status}",
+        f"SUMMARY:{escape_text(summary)}",
+    ]
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    lines.append("END:VEVENT")
+    return b"".join(fold(line) for line in lines)
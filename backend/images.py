@@ -0,0 +1,162 @@
+"""Image renditions and the stores that hold them.
+
+Uploads are content-addressed: the image id is derived from the original's
+bytes, so a rendition URL always names the same bytes and can be cached
+forever. render_renditions() is CPU-bound and runs in a process pool; it
+decodes the original once (at reduced scale for large JPEGs), then produces
+each rendition from the previous, larger one. Originals and renditions are
+kept either on the local filesystem or in a GridFS bucket.
+"""
+import asyncio
+import io
+import os
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from PIL import Image, ImageOps
+
+SOURCE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+READ_CHUNK_SIZE = 256 * 1024
+EXIF_ORIENTATION = 0x0112
+
+
+class InvalidImage(Exception):
+    pass
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def render_renditions(
+    data: bytes,
+    sizes: Dict[str, int],
+    quality: int,
+    max_pixels: int,
+) -> Tuple[str, int, int, Dict[str, Tuple[bytes, int, int]]]:
+    """Return (source extension, width, height, {name: (webp bytes, width, height)})."""
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        return _render(data, sizes, quality)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as exc:
+        raise InvalidImage(str(exc)) from None
+
+
+def _render(data: bytes, sizes: Dict[str, int], quality: int):
+    with Image.open(io.BytesIO(data)) as source:
+        if source.format not in SOURCE_FORMATS:
+            raise ValueError(f"Unsupported image format: {source.format}")
+        extension = SOURCE_FORMATS[source.format]
+        width, height = source.size
+        if source.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            width, height = height, width
+        largest = max(sizes.values())
+        # JPEG can decode straight to a power-of-two reduced scale.
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        renditions = {}
+        for name, box in sorted(sizes.items(), key=lambda item: -item[1]):
+            image.thumbnail((box, box), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="WEBP", quality=quality, method=4)
+            renditions[name] = (buffer.getvalue(), image.width, image.height)
+    return extension, width, height, renditions
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range ``Range: bytes=...`` header into inclusive offsets.
+
+    Returns None when the whole body should be sent (no header, a multi-range
+    request or another unit), and raises RangeNotSatisfiable when the range
+    lies outside the body.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            length = int(end_text)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            start, end = max(size - length, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+class LocalImageStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    async def save(self, key: str, data: bytes, media_type: str):
+        def write():
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial = f"{path}.partial"
+            with open(partial, "wb") as fh:
+                fh.write(data)
+            os.replace(partial, path)
+        await asyncio.to_thread(write)
+
+    async def stat(self, key: str) -> Optional[Tuple[int, str]]:
+        try:
+            size = (await asyncio.to_thread(os.stat, self._path(key))).st_size
+        except FileNotFoundError:
+            return None
+        return size, MEDIA_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+    async def read(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        fh = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            await asyncio.to_thread(fh.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(fh.read, min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(fh.close)
+
+
+class GridFSImageStore:
+    def __init__(self, database: Callable[[], Any], bucket_name: str = "images"):
+        self._database = database
+        self.bucket_name = bucket_name
+
+    def _bucket(self):
+        return AsyncIOMotorGridFSBucket(self._database(), bucket_name=self.bucket_name)
+
+    async def save(self, key: str, data: bytes, media_type: str):
+        await self._bucket().upload_from_stream(key, data, metadata={"contentType": media_type})
+
+    async def stat(self, key: str) -> Optional[Tuple[int, str]]:
+        doc = await self._database()[f"{self.bucket_name}.files"].find_one(
+            {"filename": key}, {"length": 1, "metadata": 1}, sort=[("uploadDate", -1)]
+        )
+        if doc is None:
+            return None
+        return doc["length"], (doc.get("metadata") or {}).get("contentType", "application/octet-stream")
+
+    async def read(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        grid_out = await self._bucket().open_download_stream_by_name(key)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,173 @@
+"""Columnar player statistics for leaderboard queries.
+
+Player.stats is free-form, so every numeric stat key becomes a float column
+(non-numeric values become NaN) in a pandas frame per team. StatsFrameCache
+keeps those frames and a concatenation of all of them, and only reloads the
+teams that were invalidated since the last query; ranking then runs on NumPy
+arrays. Invalidation only covers writes made through this process, so with
+max_age set, frames older than that are reloaded in full, which bounds how
+long writes from other workers or scripts go unseen.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+STAT_PREFIX = "stat:"
+META_COLUMNS = ["player_id", "name", "team_id", "sport", "is_active"]
+PERCENTILES = (25, 50, 75, 90, 99)
+
+
+def build_frame(players: List[Dict[str, Any]], sports: Dict[str, str]) -> pd.DataFrame:
+    frame = pd.DataFrame({
+        "player_id": [player["id"] for player in players],
+        "name": [player.get("name") for player in players],
+        "team_id": [player.get("team_id") for player in players],
+        "is_active": [bool(player.get("is_active", True)) for player in players],
+    })
+    frame["sport"] = frame["team_id"].map(sports)
+    stats = pd.DataFrame.from_records([player.get("stats") or {} for player in players])
+    if stats.empty:
+        return frame
+    stats = stats.apply(pd.to_numeric, errors="coerce").astype(float)
+    stats.columns = [STAT_PREFIX + str(column) for column in stats.columns]
+    return pd.concat([frame, stats], axis=1)
+
+
+class StatsFrameCache:
+    def __init__(
+        self,
+        load_players: Callable[[Optional[List[str]]], Awaitable[List[Dict[str, Any]]]],
+        load_team_sports: Callable[[Optional[List[str]]], Awaitable[Dict[str, str]]],
+        max_age: Optional[float] = None,
+    ):
+        self._load_players = load_players
+        self._load_team_sports = load_team_sports
+        self.max_age = max_age
+        self._loaded_at = 0.0
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._combined: Optional[pd.DataFrame] = None
+        self._loaded = False
+        self._stale: Set[str] = set()
+        self._lock = asyncio.Lock()
+        self.rebuilds = 0
+
+    def invalidate(self, *team_ids: Optional[str]):
+        self._stale.update(team_id for team_id in team_ids if team_id)
+        self._combined = None
+
+    def clear(self):
+        self._frames.clear()
+        self._combined = None
+        self._loaded = False
+        self._stale.clear()
+
+    async def _reload(self, team_ids: Optional[List[str]]):
+        players, sports = await asyncio.gather(self._load_players(team_ids), self._load_team_sports(team_ids))
+        by_team: Dict[str, List[Dict[str, Any]]] = {team_id: [] for team_id in team_ids or ()}
+        for player in players:
+            by_team.setdefault(player["team_id"], []).append(player)
+        for team_id, team_players in by_team.items():
+            if team_players:
+                self._frames[team_id] = build_frame(team_players, sports)
+            else:
+                self._frames.pop(team_id, None)
+        self.rebuilds += len(by_team)
+
+    async def frame(self, team_id: Optional[str] = None) -> pd.DataFrame:
+        async with self._lock:
+            expired = self.max_age is not None and time.monotonic() - self._loaded_at >= self.max_age
+            if not self._loaded or expired:
+                self._loaded_at = time.monotonic()
+                self._stale.clear()
+                self._frames.clear()
+                self._combined = None
+                await self._reload(None)
+                self._loaded = True
+            elif self._stale:
+                # Take the stale set before awaiting; invalidations that arrive
+                # while reloading are picked up by the next query.
+                stale, self._stale = list(self._stale), set()
+                self._combined = None
+                await self._reload(stale)
+            if team_id is not None:
+                return self._frames.get(team_id, pd.DataFrame(columns=META_COLUMNS))
+            if self._combined is None:
+                frames = list(self._frames.values())
+                self._combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=META_COLUMNS)
+            return self._combined
+
+
+def available_stats(frame: pd.DataFrame) -> List[str]:
+    return sorted(
+        column[len(STAT_PREFIX):] for column in frame.columns
+        if column.startswith(STAT_PREFIX) and frame[column].notna().any()
+    )
+
+
+def leaderboard(
+    frame: pd.DataFrame,
+    stat: str,
+    limit: int = 10,
+    sport: Optional[str] = None,
+    games_stat: str = "games",
+    per_game: bool = False,
+    active_only: bool = True,
+    ascending: bool = False,
+) -> Dict[str, Any]:
+    column = STAT_PREFIX + stat
+    result: Dict[str, Any] = {"stat": stat, "per_game": per_game, "count": 0, "mean": None, "percentiles": {}, "leaders": []}
+    if column not in frame.columns or frame.empty:
+        return result
+    mask = frame[column].notna().to_numpy()
+    if sport is not None:
+        mask = mask & (frame["sport"] == sport).to_numpy()
+    if active_only:
+        mask = mask & frame["is_active"].to_numpy(dtype=bool)
+    values = frame[column].to_numpy(dtype=float)[mask]
+    games_column = STAT_PREFIX + games_stat
+    if games_column in frame.columns:
+        games = frame[games_column].to_numpy(dtype=float)[mask]
+    else:
+        games = np.full(values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        averages = np.where(games > 0, values / games, np.nan)
+    scores = averages if per_game else values
+    ranked = np.flatnonzero(~np.isnan(scores))
+    if ranked.size == 0:
+        return result
+
+    valid_scores = scores[ranked]
+    order = valid_scores if ascending else -valid_scores
+    k = min(limit, ranked.size)
+    top = np.argpartition(order, k - 1)[:k] if k < ranked.size else np.arange(ranked.size)
+    top = top[np.argsort(order[top], kind="stable")]
+    sorted_scores = np.sort(valid_scores)
+
+    positions = np.flatnonzero(mask)[ranked[top]]
+    rows = frame[["player_id", "name", "team_id", "sport"]].iloc[positions].to_numpy()
+    result.update(
+        count=int(ranked.size),
+        mean=float(valid_scores.mean()),
+        percentiles={f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(valid_scores, PERCENTILES))},
+    )
+    result["leaders"] = [
+        {
+            "rank": rank,
+            "player_id": player_id,
+            "name": name,
+            "team_id": team_id,
+            "sport": sport_value if isinstance(sport_value, str) else None,
+            "value": float(values[ranked[i]]),
+            "per_game": None if np.isnan(averages[ranked[i]]) else float(averages[ranked[i]]),
+            "percentile": float(np.searchsorted(sorted_scores, valid_scores[i], side="right") / ranked.size * 100),
+        }
+        for rank, (i, (player_id, name, team_id, sport_value)) in enumerate(zip(top, rows), start=1)
+    ]
+    return result
+
+
+def teams_of(players: Iterable[Dict[str, Any]]) -> Set[str]:
+    return {player["team_id"] for player in players if player.get("team_id")}
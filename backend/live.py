@@ -0,0 +1,62 @@
+"""In-process fan-out of live match updates.
+
+The broker keeps one bounded queue per subscriber and the latest payload per
+match key, so a new subscriber gets the current score without a database read
+while anyone else is already watching the same match. A subscriber that falls
+behind loses its oldest queued update rather than blocking publishers.
+Keys are opaque to the broker; the server uses (club, match id), since match
+ids are only unique within a club.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Dict, Hashable, Optional, Set
+
+
+class MatchBroker:
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Hashable, Set[asyncio.Queue]] = defaultdict(set)
+        self._latest: Dict[Hashable, bytes] = {}
+
+    def subscribe(self, key: Hashable) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[key].add(queue)
+        return queue
+
+    def unsubscribe(self, key: Hashable, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[key]
+            self._latest.pop(key, None)
+
+    def has_subscribers(self, key: Hashable) -> bool:
+        return key in self._subscribers
+
+    def subscriber_count(self, key: Optional[Hashable] = None) -> int:
+        if key is not None:
+            return len(self._subscribers.get(key, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def latest(self, key: Hashable) -> Optional[bytes]:
+        return self._latest.get(key)
+
+    def remember(self, key: Hashable, payload: bytes):
+        if key in self._subscribers:
+            self._latest[key] = payload
+
+    def publish(self, key: Hashable, payload: bytes):
+        subscribers = self._subscribers.get(key)
+        if not subscribers:
+            return
+        self._latest[key] = payload
+        for queue in subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+
+def format_sse(payload: bytes, event: str = "score") -> bytes:
+    return b"event: " + event.encode("ascii") + b"\ndata: " + payload + b"\n\n"
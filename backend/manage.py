@@ -0,0 +1,100 @@
+"""Maintenance commands for the Sports Club API.
+
+Run from the backend directory, e.g. ``python manage.py reconcile-stats``.
+When serving several clubs, pick the club with ``--club``, e.g.
+``python manage.py --club fc-example rebuild-standings``.
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+import typer
+
+import server
+from tenancy import TENANT_ID_PATTERN
+
+cli = typer.Typer(help="Sports Club API maintenance commands")
+
+
+def require_tenancy():
+    if server.TENANCY == "off":
+        typer.echo("Clubs need TENANCY=header or TENANCY=host")
+        raise typer.Exit(code=1)
+
+
+@cli.callback()
+def main(club: Optional[str] = typer.Option(None, "--club", help="Club to run the command for (multi-club deployments).")):
+    """Sports Club API maintenance commands."""
+    if club is not None:
+        require_tenancy()
+        # asyncio.run() copies the current context, so every command sees the club.
+        server.current_tenant.set(club)
+
+
+@cli.command("reconcile-stats")
+def reconcile_stats():
+    """Recompute the dashboard counters from the collections."""
+    stats = asyncio.run(server.reconcile_stats())
+    for name in ("total_teams", "total_players", "upcoming_matches", "recent_news"):
+        typer.echo(f"{name}: {stats.get(name, 0)}")
+
+
+@cli.command("rebuild-standings")
+def rebuild_standings(check: bool = typer.Option(False, "--check", help="Only report differences, do not rewrite the table.")):
+    """Recompute league standings from completed matches and compare with the stored rows."""
+    result = asyncio.run(server.rebuild_standings(apply=not check))
+    for mismatch in result["mismatches"]:
+        typer.echo(
+            f"{mismatch['season']} / {mismatch['competition']} / {mismatch['team_id']}: "
+            f"expected {mismatch['expected']}, found {mismatch['actual']}"
+        )
+    typer.echo(f"{result['rows']} rows, {len(result['mismatches'])} mismatches")
+    if check and result["mismatches"]:
+        raise typer.Exit(code=1)
+
+
+@cli.command("close-season")
+def close_season(
+    season: str = typer.Argument(..., help="Season to close, as stored in Match.season."),
+    news_before: Optional[datetime] = typer.Option(
+        None, "--news-before", help="Archive news created before this date (default: NEWS_ARCHIVE_DAYS ago).",
+    ),
+):
+    """Move a finished season's matches and old news into the archive collections."""
+    result = asyncio.run(server.close_season(season, news_before=news_before))
+    if not result["closed"]:
+        typer.echo(f"{season} still has {result['unfinished']} scheduled or live matches; not closed")
+        raise typer.Exit(code=1)
+    typer.echo(f"{season} closed: {result['matches']} matches and {result['news']} news articles archived")
+
+
+@cli.command("add-club")
+def add_club(
+    club_id: str = typer.Argument(..., help="Club id: lowercase letters, digits and hyphens."),
+    name: Optional[str] = typer.Option(None, "--name", help="Display name of the club."),
+):
+    """Register a club and create its database indexes and counters."""
+    require_tenancy()
+    if not TENANT_ID_PATTERN.match(club_id):
+        typer.echo(f"Invalid club id {club_id!r}: use lowercase letters, digits and inner hyphens (max 32)")
+        raise typer.Exit(code=1)
+    club = asyncio.run(server.register_club(club_id, name))
+    typer.echo(f"{club['_id']} ({club['name']}) ready in database {server.mongo.database_name(club_id)}")
+
+
+@cli.command("bootstrap-clubs")
+def bootstrap_clubs():
+    """Create missing indexes and counters in every registered club's database (run after deploys)."""
+    require_tenancy()
+    async def run():
+        await server.ensure_shared_indexes()
+        clubs = [club async for club in server.clubs_collection.find({}, {"_id": 1, "name": 1}).sort("_id", 1)]
+        for club in clubs:
+            await server.register_club(club["_id"], club.get("name"))
+            typer.echo(f"{club['_id']}: ok")
+        return len(clubs)
+    typer.echo(f"{asyncio.run(run())} clubs bootstrapped")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,236 @@
+"""Request and database metrics rendered in the Prometheus text format.
+
+MetricsMiddleware times every HTTP request and labels it with the route
+template FastAPI matched (so /api/teams/{team_id} is one series however many
+teams exist), the method and the status. CommandMetrics is a pymongo command
+listener recording latency and returned document counts per collection and
+command, and logging commands slower than a threshold. The background job
+queue (tasks.py) reports per-job wait, run time and outcome. Observations only
+bump a few counters under a short lock; rendering does the aggregation.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue", "buildInfo"}
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, labels, le)} {cumulative}")
+            cumulative += series[-2]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], kind: str = "counter"):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.kind = kind
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def dec(self, labels: Tuple[str, ...], amount: float = 1):
+        self.inc(labels, -amount)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{format_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.requests = Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route template.",
+            ("method", "route", "status"), HTTP_BUCKETS,
+        )
+        self.in_flight = Counter(
+            "http_requests_in_flight", "HTTP requests currently being served.", ("method",), kind="gauge",
+        )
+        self.db_commands = Histogram(
+            "mongodb_command_duration_seconds", "MongoDB command latency by collection and command.",
+            ("collection", "command"), DB_BUCKETS,
+        )
+        self.db_documents = Counter(
+            "mongodb_documents_returned_total", "Documents returned or affected by MongoDB commands.",
+            ("collection", "command"),
+        )
+        self.db_failures = Counter(
+            "mongodb_command_failures_total", "Failed MongoDB commands.", ("collection", "command"),
+        )
+        self.slow_commands = Counter(
+            "mongodb_slow_commands_total", "MongoDB commands slower than the slow-query threshold.",
+            ("collection", "command"),
+        )
+        self.job_wait = Histogram(
+            "job_queue_wait_seconds", "Delay between a background job becoming due and a worker starting it.",
+            ("job",), JOB_BUCKETS,
+        )
+        self.job_duration = Histogram(
+            "job_duration_seconds", "Background job run time.", ("job",), JOB_BUCKETS,
+        )
+        self.job_outcomes = Counter(
+            "jobs_total", "Background job runs by outcome (completed, retried, failed).", ("job", "outcome"),
+        )
+
+    def render(self) -> str:
+        lines: List[str] = []
+        metrics = (
+            self.requests, self.in_flight, self.db_commands, self.db_documents, self.db_failures, self.slow_commands,
+            self.job_wait, self.job_duration, self.job_outcomes,
+        )
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed to their last byte."""
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.in_flight.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            self.registry.requests.observe((method, template, str(status)), time.perf_counter() - started)
+            self.registry.in_flight.dec((method,))
+
+
+def returned_documents(command_name: str, reply) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+    if command_name == "findAndModify":
+        return int(reply.get("value") is not None)
+    return int(reply.get("n", 0))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records every MongoDB command; runs on Motor's executor threads."""
+
+    def __init__(self, registry: MetricsRegistry, slow_ms: Optional[float] = None):
+        self.registry = registry
+        self.slow_ms = slow_ms
+        self._pending: Dict[Tuple, Tuple[str, Optional[dict]]] = {}
+
+    def _key(self, event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        name = event.command_name
+        if name in IGNORED_COMMANDS:
+            return
+        target = event.command.get("collection") if name == "getMore" else event.command.get(name)
+        collection = target if isinstance(target, str) else "-"
+        self._pending[self._key(event)] = (collection, event.command if self.slow_ms else None)
+
+    def succeeded(self, event):
+        pending = self._pending.pop(self._key(event), None)
+        if pending is None:
+            return
+        collection, command = pending
+        labels = (collection, event.command_name)
+        seconds = event.duration_micros / 1_000_000
+        self.registry.db_commands.observe(labels, seconds)
+        self.registry.db_documents.inc(labels, returned_documents(event.command_name, event.reply))
+        if self.slow_ms and seconds * 1000 >= self.slow_ms:
+            self.registry.slow_commands.inc(labels)
+            logger.warning(
+                "Slow MongoDB %s on %s took %.1f ms: %s",
+                event.command_name, collection, seconds * 1000, summarize_command(command),
+            )
+
+    def failed(self, event):
+        pending = self._pending.pop(self._key(event), None)
+        if pending is None:
+            return
+        labels = (pending[0], event.command_name)
+        self.registry.db_commands.observe(labels, event.duration_micros / 1_000_000)
+        self.registry.db_failures.inc(labels)
+
+
+def summarize_command(command: Optional[dict], limit: int = 500) -> str:
+    if not command:
+        return ""
+    shape = {key: command[key] for key in ("filter", "sort", "projection", "pipeline", "query", "update", "limit") if key in command}
+    text = repr(shape)
+    return text if len(text) <= limit else text[:limit] + "..."
@@ -0,0 +1,171 @@
+"""MongoDB client lifecycle, pool settings and read routing.
+
+MongoConnection owns the Motor client: the app lifespan opens it, warms the
+pool and closes it on shutdown. Code that runs outside the app (manage.py,
+benchmarks) gets a client opened on first use. The rest of the backend holds
+CollectionProxy objects, which resolve to the current client's collection on
+each use; ``proxy.reads`` resolves to the same collection with the read
+preference configured for read-only endpoints, while the proxy itself always
+reads and writes through the primary.
+
+Given a ``tenant`` context variable, the connection serves one database per
+club over the same client (and so the same pool): while the variable is set,
+database() returns ``tenant_prefix + club``; unset, it returns db_name. Shared
+proxies always resolve to db_name, for collections that span all clubs.
+"""
+import asyncio
+import os
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def client_options_from_env() -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')),
+        "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+        "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '10000')),
+        "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '10000')),
+        "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000')),
+        "appname": os.environ.get('MONGO_APP_NAME', 'sports-club-api'),
+    }
+    socket_timeout = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '0'))
+    if socket_timeout:
+        options["socketTimeoutMS"] = socket_timeout
+    compressors = os.environ.get('MONGO_COMPRESSORS', '')
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def read_preference_from_env():
+    name = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"MONGO_READ_PREFERENCE must be one of {', '.join(READ_PREFERENCES)}, got {name!r}")
+    if name == "primary":
+        return Primary()
+    max_staleness = int(os.environ.get('MONGO_MAX_STALENESS_SECONDS', '-1'))
+    return READ_PREFERENCES[name](max_staleness=max_staleness)
+
+
+class MongoConnection:
+    def __init__(
+        self,
+        url: str,
+        db_name: str,
+        options: Optional[Dict[str, Any]] = None,
+        read_preference=None,
+        event_listeners: Optional[List[Any]] = None,
+        tenant: Optional[ContextVar] = None,
+        tenant_prefix: Optional[str] = None,
+    ):
+        self.url = url
+        self.db_name = db_name
+        self.options = options or {}
+        self.read_preference = read_preference or Primary()
+        self.event_listeners = event_listeners or []
+        self.tenant = tenant
+        self.tenant_prefix = tenant_prefix if tenant_prefix is not None else f"{db_name}_"
+        self.client: Optional[AsyncIOMotorClient] = None
+        self._database = None
+        self._read_database = None
+        self._tenant_databases: Dict[str, Tuple[Any, Any]] = {}
+
+    def open(self) -> AsyncIOMotorClient:
+        if self.client is None:
+            self.client = AsyncIOMotorClient(self.url, event_listeners=self.event_listeners, **self.options)
+            self._database = self.client[self.db_name]
+            self._read_database = self._database.with_options(read_preference=self.read_preference)
+        return self.client
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = self._database = self._read_database = None
+        self._tenant_databases.clear()
+
+    def database_name(self, tenant: Optional[str]) -> str:
+        return self.db_name if tenant is None else f"{self.tenant_prefix}{tenant}"
+
+    def _databases(self, shared: bool) -> Tuple[Any, Any]:
+        self.open()
+        tenant = None if shared or self.tenant is None else self.tenant.get()
+        if tenant is None:
+            return self._database, self._read_database
+        databases = self._tenant_databases.get(tenant)
+        if databases is None:
+            database = self.client[self.database_name(tenant)]
+            databases = self._tenant_databases[tenant] = (
+                database, database.with_options(read_preference=self.read_preference),
+            )
+        return databases
+
+    def database(self, shared: bool = False):
+        return self._databases(shared)[0]
+
+    def read_database(self, shared: bool = False):
+        return self._databases(shared)[1]
+
+    async def read_session(self):
+        """Start a causally consistent session for reads through read_database().
+
+        Reads in one such session never see older data than an earlier read
+        in it, even when served by different (or lagging) secondaries. Returns
+        None when reads go to the primary, which gives that ordering anyway.
+        The caller ends the session.
+        """
+        if self.read_preference == Primary():
+            return None
+        return await self.open().start_session(causal_consistency=True)
+
+    async def warm_up(self, connections: Optional[int] = None):
+        """Open pooled connections now so the first requests do not pay for them.
+
+        Each concurrent ping checks out its own connection, so the pool ends
+        up holding ``connections`` sockets to the primary and, when reads are
+        routed elsewhere, to the read-preference target as well.
+        """
+        connections = connections or max(self.options.get("minPoolSize", 0), 1)
+        database, read_database = self.database(), self.read_database()
+        pings = [database.command("ping") for _ in range(connections)]
+        if self.read_preference != Primary():
+            pings += [read_database.command("ping", read_preference=self.read_preference) for _ in range(connections)]
+        await asyncio.gather(*pings)
+
+
+class CollectionProxy:
+    def __init__(self, connection: MongoConnection, name: str, reads: bool = False, shared: bool = False):
+        self._connection = connection
+        self._name = name
+        self._reads = reads
+        self._shared = shared
+        self._read_proxy = self if reads else CollectionProxy(connection, name, reads=True, shared=shared)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def reads(self) -> "CollectionProxy":
+        return self._read_proxy
+
+    def resolve(self):
+        if self._reads:
+            database = self._connection.read_database(self._shared)
+        else:
+            database = self._connection.database(self._shared)
+        return database[self._name]
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
@@ -1,16 +1,71 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Body, Depends, File, Query, Request, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import DuplicateKeyError
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime, date
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from bson.errors import InvalidDocument
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Literal, Tuple, Type
+from datetime import datetime, date, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from enum import Enum
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import multiprocessing
+import orjson
 import os
+import re
+import time
 import uuid
 
+from archive import copy_documents, delete_archived
+from cache import EntityCache, MemoryCache, RedisCache
+from ical import CALENDAR_FOOTER, calendar_header, vevent
+from images import MEDIA_TYPES, GridFSImageStore, InvalidImage, LocalImageStore, RangeNotSatisfiable, parse_range, render_renditions
+from leaderboards import StatsFrameCache, available_stats, leaderboard, teams_of
+from live import MatchBroker, format_sse
+from metrics import CommandMetrics, MetricsMiddleware, MetricsRegistry
+from mongo import CollectionProxy, MongoConnection, client_options_from_env, read_preference_from_env
+from standings import DEFAULT_POINT_SYSTEMS, STAT_FIELDS, compute_standings, rank_table, standings_delta
+from tasks import JobQueue
+from tenancy import TENANCY_MODES, TenantLocal, TenantMiddleware, current_tenant, header_resolver, host_resolver
+
+logger = logging.getLogger(__name__)
+
+# The MongoDB client lives for the lifetime of the app: it is opened and its
+# pool warmed before the first request, and closed on shutdown.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mongo.open()
+    await mongo.warm_up(MONGO_WARMUP_CONNECTIONS)
+    await ensure_shared_indexes()
+    if TENANCY == "off":
+        await bootstrap_database()
+    else:
+        await schedule_club_publications()
+    await start_match_change_stream()
+    await task_queue.start()
+    try:
+        yield
+    finally:
+        await task_queue.stop(TASK_SHUTDOWN_TIMEOUT)
+        await stop_match_change_stream()
+        shutdown_image_pool()
+        mongo.close()
+
 # Initialize FastAPI app
-app = FastAPI(title="Sports Club API", description="API for Sports Club Management")
+app = FastAPI(
+    title="Sports Club API",
+    description="API for Sports Club Management",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # CORS configuration
 app.add_middleware(
@@ -19,20 +74,731 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+# Metrics
+# Request latency per route template and MongoDB command latency per
+# collection, served at /api/metrics in the Prometheus text format. Commands
+# slower than SLOW_QUERY_MS are logged (0 turns the slow-query log off).
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+metrics = MetricsRegistry()
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
 # MongoDB setup
+# Pool size, timeouts and wire compression come from MONGO_* variables (see
+# mongo.py). Writes and anything cached from a read go to the primary;
+# listing and search endpoints read through collection.reads, which follows
+# MONGO_READ_PREFERENCE (e.g. secondaryPreferred, bounded by
+# MONGO_MAX_STALENESS_SECONDS).
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.sports_club
+DB_NAME = os.environ.get('DB_NAME', 'sports_club')
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get('MONGO_WARMUP_CONNECTIONS', '0')) or None
+TENANCY = os.environ.get('TENANCY', 'off')
+if TENANCY not in TENANCY_MODES:
+    raise ValueError(f"TENANCY must be one of {', '.join(TENANCY_MODES)}, got {TENANCY!r}")
+mongo = MongoConnection(
+    MONGO_URL,
+    DB_NAME,
+    options=client_options_from_env(),
+    read_preference=read_preference_from_env(),
+    event_listeners=[CommandMetrics(metrics, SLOW_QUERY_MS)] if METRICS_ENABLED else [],
+    tenant=current_tenant if TENANCY != "off" else None,
+    tenant_prefix=os.environ.get('TENANT_DB_PREFIX', f"{DB_NAME}_club_"),
+)
 
 # Collections
-teams_collection = db.teams
-players_collection = db.players
-matches_collection = db.matches
-events_collection = db.events
-news_collection = db.news
-sponsors_collection = db.sponsors
+teams_collection = CollectionProxy(mongo, "teams")
+players_collection = CollectionProxy(mongo, "players")
+matches_collection = CollectionProxy(mongo, "matches")
+events_collection = CollectionProxy(mongo, "events")
+news_collection = CollectionProxy(mongo, "news")
+sponsors_collection = CollectionProxy(mongo, "sponsors")
+stats_collection = CollectionProxy(mongo, "stats")
+change_markers_collection = CollectionProxy(mongo, "change_markers")
+standings_collection = CollectionProxy(mongo, "standings")
+registrations_collection = CollectionProxy(mongo, "event_registrations")
+matches_archive_collection = CollectionProxy(mongo, "matches_archive")
+news_archive_collection = CollectionProxy(mongo, "news_archive")
+seasons_collection = CollectionProxy(mongo, "seasons")
+# Shared by every club (see Multi-club tenancy).
+images_collection = CollectionProxy(mongo, "images", shared=True)
+jobs_collection = CollectionProxy(mongo, "jobs", shared=True)
+clubs_collection = CollectionProxy(mongo, "clubs", shared=True)
+
+# Indexes backing every lookup, filter and sort issued by the endpoints below.
+# create_indexes is a no-op for indexes that already exist with the same spec,
+# so this runs safely on every startup.
+COLLECTION_INDEXES = {
+    "teams": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("name", TEXT), ("description", TEXT)], weights={"name": 10, "description": 1}, name="search_text"),
+    ],
+    "players": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("team_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("is_active", ASCENDING)]),
+        IndexModel([("name", TEXT), ("position", TEXT), ("bio", TEXT)], weights={"name": 10, "position": 3, "bio": 1}, name="search_text"),
+    ],
+    "matches": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("match_date", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("season", ASCENDING), ("match_date", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("match_date", ASCENDING)]),
+        IndexModel([("home_team_id", ASCENDING), ("match_date", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("away_team_id", ASCENDING), ("match_date", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "matches_archive": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("season", ASCENDING), ("match_date", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("home_team_id", ASCENDING), ("season", ASCENDING), ("match_date", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("away_team_id", ASCENDING), ("season", ASCENDING), ("match_date", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "events": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("event_date", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("title", TEXT), ("description", TEXT)], weights={"title": 10, "description": 1}, name="search_text"),
+    ],
+    "news": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("published", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel(
+            [("title", TEXT), ("summary", TEXT), ("content", TEXT), ("tags", TEXT)],
+            weights={"title": 10, "tags": 5, "summary": 3, "content": 1},
+            name="search_text",
+        ),
+    ],
+    "news_archive": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("published", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "standings": [
+        IndexModel([("season", ASCENDING), ("competition", ASCENDING), ("team_id", ASCENDING)], unique=True),
+    ],
+    "sponsors": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("active", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "event_registrations": [
+        IndexModel([("event_id", ASCENDING), ("member_id", ASCENDING)], unique=True),
+        IndexModel([("event_id", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ],
+}
+
+SHARED_COLLECTION_INDEXES = {
+    "images": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)]),
+        IndexModel(
+            [("key", ASCENDING), ("context", ASCENDING)],
+            unique=True, partialFilterExpression={"status": "pending", "key": {"$exists": True}},
+        ),
+    ],
+}
+
+async def ensure_indexes(database=None):
+    database = database if database is not None else mongo.database()
+    for name, indexes in COLLECTION_INDEXES.items():
+        await database[name].create_indexes(indexes)
+
+async def ensure_shared_indexes():
+    database = mongo.database(shared=True)
+    for name, indexes in SHARED_COLLECTION_INDEXES.items():
+        await database[name].create_indexes(indexes)
+
+# Everything a club's database needs before it serves requests; run at
+# startup for the single database, and once per process for each club.
+async def bootstrap_database():
+    await ensure_indexes()
+    if await stats_collection.find_one({"_id": STATS_ID}) is None:
+        await reconcile_stats()
+    await schedule_pending_publications()
+
+# Multi-club tenancy
+# With TENANCY=header (club id in the TENANT_HEADER header, or the ?club=
+# query parameter for EventSource and WebSocket clients) or TENANCY=host
+# (first host label, or what precedes TENANT_HOST_SUFFIX), one deployment
+# serves every club registered in the clubs collection (manage.py add-club).
+# Each club gets its own database, TENANT_DB_PREFIX + club id, on the one
+# shared client and pool; requests without a club use TENANT_DEFAULT or get
+# 400, unknown clubs 404. A club's indexes and counters are bootstrapped by
+# the first request it gets in each process; scheduled publications of every
+# club are queued again at startup. Caches are shared and bounded,
+# with keys namespaced by club; the little per-club state that is not a
+# cache entry lives in TenantLocal objects. Images are content-addressed and
+# shared by all clubs, as are jobs, which carry the club they were enqueued
+# for. TENANCY=off (the default) serves DB_NAME alone, as before.
+TENANT_HEADER = os.environ.get('TENANT_HEADER', 'X-Club-Id')
+TENANT_HOST_SUFFIX = os.environ.get('TENANT_HOST_SUFFIX', '')
+TENANT_DEFAULT = os.environ.get('TENANT_DEFAULT') or None
+TENANT_EXEMPT_PATHS = {"/api/", "/api/metrics", "/api/tasks/stats", "/api/cache/stats"}
+_known_clubs: set = set()
+_ready_clubs: set = set()
+_club_bootstraps: Dict[str, asyncio.Task] = {}
+
+async def club_exists(club_id: str) -> bool:
+    if club_id in _known_clubs:
+        return True
+    if await clubs_collection.find_one({"_id": club_id}, {"_id": 1}) is None:
+        return False
+    _known_clubs.add(club_id)
+    return True
+
+async def ensure_club_ready(club_id: str):
+    if club_id in _ready_clubs:
+        return
+    # Concurrent first requests share one bootstrap; a failed one is retried
+    # by the next request.
+    bootstrap = _club_bootstraps.get(club_id)
+    if bootstrap is None:
+        bootstrap = _club_bootstraps[club_id] = asyncio.create_task(bootstrap_database())
+    try:
+        await asyncio.shield(bootstrap)
+        _ready_clubs.add(club_id)
+    finally:
+        if bootstrap.done():
+            _club_bootstraps.pop(club_id, None)
+
+async def register_club(club_id: str, name: Optional[str] = None) -> Dict[str, Any]:
+    club = await clubs_collection.find_one_and_update(
+        {"_id": club_id},
+        {"$set": {"name": name or club_id}, "$setOnInsert": {"created_at": datetime.now()}},
+        upsert=True, return_document=ReturnDocument.AFTER,
+    )
+    token = current_tenant.set(club_id)
+    try:
+        await bootstrap_database()
+    finally:
+        current_tenant.reset(token)
+    return club
+
+async def schedule_club_publications():
+    # Clubs are otherwise bootstrapped lazily; scheduled articles must not
+    # wait for a club's first request after a restart to be queued again.
+    async for club in clubs_collection.find({}, {"_id": 1}):
+        token = current_tenant.set(club["_id"])
+        try:
+            await schedule_pending_publications()
+        except Exception:
+            logger.exception("Could not reschedule publications for club %s", club["_id"])
+        finally:
+            current_tenant.reset(token)
+
+def tenant_exempt(scope) -> bool:
+    path = scope.get("path", "")
+    return path in TENANT_EXEMPT_PATHS or (scope.get("method") == "GET" and path.startswith("/api/images/"))
+
+if TENANCY != "off":
+    app.add_middleware(
+        TenantMiddleware,
+        resolve=header_resolver(TENANT_HEADER, "club") if TENANCY == "header" else host_resolver(TENANT_HOST_SUFFIX),
+        is_known=club_exists,
+        prepare=ensure_club_ready,
+        default=TENANT_DEFAULT,
+        exempt=tenant_exempt,
+        vary=TENANT_HEADER if TENANCY == "header" else None,
+    )
+
+# Background jobs
+# Follow-up work that the response does not depend on runs on task_queue
+# (see tasks.py): TASK_WORKERS workers, TASK_MAX_ATTEMPTS attempts with
+# backoff doubling from TASK_RETRY_BACKOFF seconds. With TASKS_DURABLE=1 jobs
+# are kept in the jobs collection and survive restarts. Handlers are
+# registered next to the code that enqueues them; /api/tasks/stats reports
+# queue depth and per-job latency.
+TASKS_DURABLE = os.environ.get('TASKS_DURABLE', '0') == '1'
+TASK_SHUTDOWN_TIMEOUT = float(os.environ.get('TASK_SHUTDOWN_TIMEOUT', '10'))
+task_queue = JobQueue(
+    collection=jobs_collection if TASKS_DURABLE else None,
+    workers=int(os.environ.get('TASK_WORKERS', '4')),
+    max_attempts=int(os.environ.get('TASK_MAX_ATTEMPTS', '5')),
+    backoff=float(os.environ.get('TASK_RETRY_BACKOFF', '1')),
+    max_backoff=float(os.environ.get('TASK_MAX_BACKOFF', '300')),
+    poll_interval=float(os.environ.get('TASK_POLL_INTERVAL', '1')),
+    lease=float(os.environ.get('TASK_LEASE_SECONDS', '300')),
+    metrics=metrics,
+    context=current_tenant,
+)
+
+# Dashboard counters
+# /api/stats reads a single counters document that the write paths keep up to
+# date with $inc. "Upcoming matches" depends on the clock as well as on
+# writes, so the document also stores next_kickoff, the earliest kickoff still
+# counted; the first read after that moment recounts the upcoming fixtures
+# and moves next_kickoff forward. reconcile_stats() rebuilds every counter
+# from the collections (see manage.py reconcile-stats).
+STATS_ID = "dashboard"
+
+def as_stored_datetime(value: datetime) -> datetime:
+    # MongoDB stores aware datetimes as naive UTC; compare the way it reads back.
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def counts_as_upcoming(match: Optional[Dict[str, Any]]) -> bool:
+    return bool(match) and match.get("status") == MatchStatus.SCHEDULED \
+        and as_stored_datetime(match["match_date"]) >= datetime.now()
+
+async def bump_stats(next_kickoff: Optional[datetime] = None, **counters: int):
+    update: Dict[str, Any] = {}
+    counters = {name: delta for name, delta in counters.items() if delta}
+    if counters:
+        update["$inc"] = counters
+    if next_kickoff is not None:
+        update["$min"] = {"next_kickoff": next_kickoff}
+    if update:
+        await stats_collection.update_one({"_id": STATS_ID}, update, upsert=True)
+
+async def bump_upcoming_matches(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    counted = counts_as_upcoming(after)
+    await bump_stats(
+        next_kickoff=after["match_date"] if counted else None,
+        upcoming_matches=int(counted) - int(counts_as_upcoming(before)),
+    )
+
+async def count_upcoming_matches() -> Dict[str, Any]:
+    now = datetime.now()
+    query = {"status": MatchStatus.SCHEDULED, "match_date": {"$gte": now}}
+    upcoming, next_match = await asyncio.gather(
+        matches_collection.count_documents(query),
+        matches_collection.find_one(query, {"_id": 0, "match_date": 1}, sort=[("match_date", ASCENDING)]),
+    )
+    return {"upcoming_matches": upcoming, "next_kickoff": next_match["match_date"] if next_match else None}
+
+async def store_upcoming_matches(upcoming: Dict[str, Any], **counters: int) -> Dict[str, Any]:
+    update: Dict[str, Any] = {"$set": {"upcoming_matches": upcoming["upcoming_matches"], **counters}}
+    if upcoming["next_kickoff"] is None:
+        update["$unset"] = {"next_kickoff": ""}
+    else:
+        update["$set"]["next_kickoff"] = upcoming["next_kickoff"]
+    return await stats_collection.find_one_and_update(
+        {"_id": STATS_ID}, update, upsert=True, return_document=ReturnDocument.AFTER
+    )
+
+async def reconcile_stats() -> Dict[str, Any]:
+    total_teams, total_players, recent_news, upcoming = await asyncio.gather(
+        teams_collection.count_documents({}),
+        players_collection.count_documents({"is_active": True}),
+        news_collection.count_documents({"published": True}),
+        count_upcoming_matches(),
+    )
+    return await store_upcoming_matches(
+        upcoming, total_teams=total_teams, total_players=total_players, recent_news=recent_news
+    )
+
+async def read_stats() -> Dict[str, Any]:
+    stats = await stats_collection.find_one({"_id": STATS_ID})
+    if stats is None:
+        return await reconcile_stats()
+    if stats.get("next_kickoff") is not None and stats["next_kickoff"] < datetime.now():
+        return await store_upcoming_matches(await count_upcoming_matches())
+    return stats
+
+# Entity cache
+# get_team, get_player and get_match read through a cache keyed by entity
+# kind and id; the write paths for those entities invalidate their entry.
+# Entries live in-process by default; set CACHE_REDIS_URL to share them (and
+# therefore invalidations) between workers.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))
+CACHE_TTLS = {
+    "teams": float(os.environ.get('CACHE_TTL_TEAMS', '300')),
+    "players": float(os.environ.get('CACHE_TTL_PLAYERS', '300')),
+    "matches": float(os.environ.get('CACHE_TTL_MATCHES', '30')),
+}
+entity_cache = EntityCache(
+    RedisCache(CACHE_REDIS_URL) if CACHE_REDIS_URL else MemoryCache(CACHE_MAX_ENTRIES),
+    ttls=CACHE_TTLS,
+    namespace=current_tenant.get,
+)
+
+async def get_cached_entity(kind: str, collection, entity_id: str) -> Optional[Dict[str, Any]]:
+    return await entity_cache.get_or_load(
+        kind, entity_id, lambda: collection.find_one({"id": entity_id}, {"_id": 0})
+    )
+
+# Versioning and conditional requests
+# Every document carries updated_at and a version that each write increments.
+# Every write also bumps a change marker for its collection, a tiny document
+# in change_markers. List responses get a strong ETag derived from that
+# marker and the request, entity responses one derived from the entity's
+# version, so If-None-Match / If-Modified-Since can be answered with a 304
+# from the marker or the entity cache without re-running the query.
+LIST_CACHE_CONTROL = os.environ.get('LIST_CACHE_CONTROL', 'public, no-cache')
+
+def bson_safe(doc: Dict[str, Any]) -> Dict[str, Any]:
+    # BSON has no date type: store dates (e.g. Player.joined_date) as midnight.
+    return {
+        name: datetime.combine(value, datetime.min.time()) if type(value) is date else value
+        for name, value in doc.items()
+    }
+
+def stamp_new(model: BaseModel) -> Dict[str, Any]:
+    model.version = 1
+    model.updated_at = datetime.now()
+    return bson_safe(model.dict())
+
+async def bump_marker(*names: str):
+    now = datetime.now()
+    await asyncio.gather(*(
+        change_markers_collection.update_one(
+            {"_id": name}, {"$inc": {"version": 1}, "$set": {"updated_at": now}}, upsert=True
+        )
+        for name in names
+    ))
+
+async def read_marker(name: str, session=None) -> Dict[str, Any]:
+    # In a read session (mongo.read_session()) the marker is read the way the
+    # documents it validates are read, so they cannot be older than it.
+    collection = change_markers_collection.reads if session is not None else change_markers_collection
+    marker = await collection.find_one({"_id": name}, session=session)
+    return marker or {"_id": name, "version": 0, "updated_at": None}
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL, "Vary": "Accept"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            # A "-0000" zone parses as naive; HTTP dates are always UTC.
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+    return False
+
+def list_etag(marker: Dict[str, Any], request: Request) -> str:
+    updated_at = marker["updated_at"].isoformat() if marker["updated_at"] else ""
+    key = f"{current_tenant.get()}|{marker['_id']}|{marker['version']}|{updated_at}|{request.url.path}|{request.url.query}|{wants_ndjson(request)}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+def entity_response(request: Request, doc: Dict[str, Any]) -> Response:
+    etag = f'"{doc["id"]}-{doc.get("version", 0)}"'
+    headers = validator_headers(etag, doc.get("updated_at") or doc.get("created_at"))
+    if is_not_modified(request, etag, doc.get("updated_at") or doc.get("created_at")):
+        return Response(status_code=304, headers=headers)
+    response = document_response(doc)
+    response.headers.update(headers)
+    return response
+
+# Updates
+# PUT and PATCH both go through update_document(): a single
+# find_one_and_update that $sets only the given fields, bumps the version and
+# returns the previous document, from which the new one is built without a
+# second read. id, created_at, updated_at and version are never written by
+# clients. An If-Match header carrying the entity's ETag ("<id>-<version>")
+# makes the write conditional on that version; a stale one gets 412 with the
+# current ETag, so two scorekeepers editing the same match cannot silently
+# overwrite each other.
+SERVER_MANAGED_FIELDS = {"id", "created_at", "updated_at", "version"}
+_field_adapters: Dict[Tuple[Type[BaseModel], str], TypeAdapter] = {}
+
+def expected_version(request: Request, entity_id: str) -> Optional[int]:
+    if_match = request.headers.get("if-match")
+    if not if_match or if_match.strip() == "*":
+        return None
+    prefix = f"{entity_id}-"
+    for tag in if_match.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag.startswith(prefix) and tag[len(prefix):].isdigit():
+            return int(tag[len(prefix):])
+    raise HTTPException(status_code=412, detail="If-Match does not name a version of this resource")
+
+def validate_changes(model: Type[BaseModel], changes: Dict[str, Any]) -> Dict[str, Any]:
+    if not changes:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    unknown = set(changes) - set(model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    managed = set(changes) & SERVER_MANAGED_FIELDS
+    if managed:
+        raise HTTPException(status_code=400, detail=f"Read-only fields: {', '.join(sorted(managed))}")
+    validated, errors = {}, []
+    for name, value in changes.items():
+        adapter = _field_adapters.get((model, name))
+        if adapter is None:
+            adapter = _field_adapters[(model, name)] = TypeAdapter(model.model_fields[name].annotation)
+        try:
+            validated[name] = adapter.dump_python(adapter.validate_python(value))
+        except ValidationError as exc:
+            errors.extend({"loc": [name, *error["loc"]], "msg": error["msg"]} for error in exc.errors())
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return validated
+
+async def update_document(request: Request, collection, label: str, entity_id: str, changes: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    changes = bson_safe(changes)
+    query = {"id": entity_id}
+    version = expected_version(request, entity_id)
+    if version is not None:
+        query["version"] = version
+    now = datetime.now()
+    before = await collection.find_one_and_update(
+        query, {"$set": {**changes, "updated_at": now}, "$inc": {"version": 1}}, projection={"_id": 0}
+    )
+    if before is None:
+        current = await collection.find_one({"id": entity_id}, {"_id": 0, "version": 1}) if version is not None else None
+        if current is None:
+            raise HTTPException(status_code=404, detail=f"{label} not found")
+        raise HTTPException(
+            status_code=412,
+            detail=f"{label} was modified since version {version}",
+            headers={"ETag": f'"{entity_id}-{current.get("version", 0)}"'},
+        )
+    after = {**before, **changes, "updated_at": now, "version": before.get("version", 0) + 1}
+    return before, after
+
+def updated_response(doc: Dict[str, Any]) -> Response:
+    response = document_response(doc)
+    response.headers["ETag"] = f'"{doc["id"]}-{doc["version"]}"'
+    return response
+
+# Keyset pagination
+# List endpoints page on (sort key, id). The cursor is an opaque token holding
+# the sort value and id of the last document on the page, so fetching page N
+# costs one index seek no matter how deep N is. The next cursor is returned in
+# the X-Next-Cursor header and is absent on the last page.
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(doc: Dict[str, Any], sort_field: str) -> str:
+    value = doc.get(sort_field)
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    raw = json.dumps([value, doc["id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, doc_id = json.loads(raw)
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, doc_id
+
+def keyset_filter(query: Dict[str, Any], sort_field: str, direction: int, cursor: Optional[str]) -> Dict[str, Any]:
+    if not cursor:
+        return query
+    if list(query) == ["$or"]:
+        # Keep a rooted $or rooted so each branch still uses its own index and
+        # the branches merge on the sort key instead of being sorted in memory.
+        return {"$or": [keyset_filter(branch, sort_field, direction, cursor) for branch in query["$or"]]}
+    value, doc_id = decode_cursor(cursor)
+    op, op_or_equal = ("$gt", "$gte") if direction == ASCENDING else ("$lt", "$lte")
+    after = {
+        sort_field: {op_or_equal: value},
+        "$or": [{sort_field: {op: value}}, {"id": {op: doc_id}}],
+    }
+    return {"$and": [query, after]} if query else after
+
+async def fetch_page(collection, query: Dict[str, Any], sort_field: str, direction: int, limit: int, cursor: Optional[str] = None, projection: Optional[Dict[str, int]] = None, session=None):
+    docs = await collection.find(keyset_filter(query, sort_field, direction, cursor), projection, session=session) \
+        .sort([(sort_field, direction), ("id", direction)]) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1], sort_field) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+# Projections
+# Every list read projects to the fields of the model it returns, so the
+# summary views never read the heavy fields from MongoDB. A ?fields=a,b,c
+# parameter narrows that further to an explicit subset; id and the sort key
+# are always included so pagination keeps working.
+def build_projection(model: Type[BaseModel], fields: Optional[str], sort_field: str) -> Dict[str, int]:
+    if fields:
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = names - set(model.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        names |= {"id", sort_field}
+    else:
+        names = set(model.model_fields)
+    projection = {name: 1 for name in names}
+    projection["_id"] = 0
+    return projection
+
+# Fast read path
+# Documents are validated by their model when they are written, so read
+# handlers encode what MongoDB returns straight to JSON with orjson instead of
+# rebuilding the models and letting FastAPI validate and serialize them a
+# second time. The response_model on read routes only documents the schema.
+def document_response(content: Any) -> ORJSONResponse:
+    return ORJSONResponse(content=content)
+
+# NDJSON streaming
+# Clients sending "Accept: application/x-ndjson" get one JSON document per
+# line, encoded as the cursor yields them and flushed every STREAM_BATCH_SIZE
+# documents. Without an explicit limit the stream runs to the end of the
+# collection (or from the given cursor onwards) in constant memory.
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '500'))
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def stream_documents(collection, query: Dict[str, Any], sort_field: str, direction: int, limit: Optional[int], cursor: Optional[str] = None, projection: Optional[Dict[str, int]] = None, session=None) -> StreamingResponse:
+    # The stream outlives the handler, so it ends the session it is given.
+    mongo_cursor = collection.find(keyset_filter(query, sort_field, direction, cursor), projection, session=session) \
+        .sort([(sort_field, direction), ("id", direction)]) \
+        .limit(limit or 0) \
+        .batch_size(STREAM_BATCH_SIZE)
+
+    async def lines():
+        try:
+            chunk = []
+            async for doc in mongo_cursor:
+                chunk.append(orjson.dumps(doc))
+                if len(chunk) >= STREAM_BATCH_SIZE:
+                    yield b"\n".join(chunk) + b"\n"
+                    chunk = []
+            if chunk:
+                yield b"\n".join(chunk) + b"\n"
+        finally:
+            if session is not None:
+                await session.end_session()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+async def list_documents(request: Request, collection, model: Type[BaseModel], query: Dict[str, Any], sort_field: str, direction: int, limit: Optional[int], cursor: Optional[str], default_limit: int, fields: Optional[str] = None):
+    projection = build_projection(model, fields, sort_field)
+    # The marker is read before the documents, in the same causally consistent
+    # session when reads go to secondaries, so a concurrent write or a lagging
+    # member can only make the ETag older than the body, never newer.
+    session = await mongo.read_session()
+    try:
+        marker = await read_marker(collection.name, session)
+        headers = validator_headers(list_etag(marker, request), marker["updated_at"])
+        if is_not_modified(request, headers["ETag"], marker["updated_at"]):
+            return Response(status_code=304, headers=headers)
+        if wants_ndjson(request):
+            response = stream_documents(collection.reads, query, sort_field, direction, limit, cursor, projection, session)
+            session = None
+        else:
+            docs, next_cursor = await fetch_page(collection.reads, query, sort_field, direction, limit or default_limit, cursor, projection, session)
+            response = document_response(docs)
+            set_next_cursor(response, next_cursor)
+    finally:
+        if session is not None:
+            await session.end_session()
+    response.headers.update(headers)
+    return response
+
+# Bulk import
+# POST /api/<collection>/bulk takes a JSON array, or NDJSON when sent as
+# application/x-ndjson (read incrementally from the request stream). Rows are
+# validated one by one and written with unordered insert_many in chunks of
+# BULK_CHUNK_SIZE, so a bad row never blocks the rest. The response reports
+# how many rows were inserted and why each rejected row failed.
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', '1000'))
+
+async def read_bulk_rows(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        row, buffer = 0, b""
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield row, line
+                    row += 1
+        if buffer.strip():
+            yield row, buffer
+        return
+    try:
+        rows = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for row, item in enumerate(rows):
+        yield row, item
+
+def validation_errors(exc: ValidationError) -> List[Dict[str, Any]]:
+    return [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+
+async def bulk_insert(
+    request: Request,
+    collection,
+    model: Type[BaseModel],
+    on_inserted: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None,
+    check: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Dict[int, str]]]] = None,
+) -> Dict[str, Any]:
+    # check(docs) returns {index in docs: error} for rows of a chunk to reject
+    # before inserting it.
+    report: Dict[str, Any] = {"inserted": 0, "failed": 0, "errors": []}
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+
+    def reject(row: int, error: Any):
+        report["failed"] += 1
+        report["errors"].append({"row": row, "error": error})
+
+    async def flush():
+        docs = [doc for _, doc in chunk]
+        failed: Dict[int, str] = await check(docs) if check is not None else {}
+        pending = [index for index in range(len(docs)) if index not in failed]
+        try:
+            if pending:
+                await collection.insert_many([docs[index] for index in pending], ordered=False)
+        except BulkWriteError as exc:
+            failed.update({pending[error["index"]]: error["errmsg"] for error in exc.details["writeErrors"]})
+        except InvalidDocument as exc:
+            failed.update({index: str(exc) for index in pending})
+        inserted = []
+        for index, (row, doc) in enumerate(chunk):
+            if index in failed:
+                reject(row, failed[index])
+            else:
+                inserted.append(doc)
+        report["inserted"] += len(inserted)
+        if inserted:
+            await bump_marker(collection.name)
+            if on_inserted is not None:
+                await on_inserted(inserted)
+        chunk.clear()
+
+    async for row, item in read_bulk_rows(request):
+        try:
+            if isinstance(item, bytes):
+                doc = stamp_new(model.model_validate_json(item))
+            else:
+                doc = stamp_new(model.model_validate(item))
+        except ValidationError as exc:
+            reject(row, validation_errors(exc))
+            continue
+        chunk.append((row, doc))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+    return report
 
 # Enums
 class SportType(str, Enum):
@@ -56,6 +822,19 @@ class EventType(str, Enum):
     SOCIAL = "social"
 
 # Pydantic Models
+class ImageRendition(BaseModel):
+    url: str
+    width: int
+    height: int
+    size: int
+
+# The original plus its resized renditions (thumb, card, large by default),
+# as returned by POST /api/images.
+class ImageSet(BaseModel):
+    id: str
+    original: ImageRendition
+    renditions: Dict[str, ImageRendition] = {}
+
 class Team(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -63,11 +842,14 @@ class Team(BaseModel):
     category: str  # e.g., "Senior", "Junior", "Youth"
     description: str
     image: Optional[str] = None
+    image_set: Optional[ImageSet] = None
     founded_year: Optional[int] = None
     coach: Optional[str] = None
     home_venue: Optional[str] = None
     achievements: List[str] = []
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    version: int = 1
 
 class Player(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -80,11 +862,14 @@ class Player(BaseModel):
     weight: Optional[str] = None
     bio: Optional[str] = None
     image: Optional[str] = None
+    image_set: Optional[ImageSet] = None
     stats: Dict[str, Any] = {}
     achievements: List[str] = []
     joined_date: Optional[date] = None
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    version: int = 1
 
 class Match(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -102,6 +887,8 @@ class Match(BaseModel):
     season: Optional[str] = None
     competition: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    version: int = 1
 
 class Event(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -116,7 +903,14 @@ class Event(BaseModel):
     current_participants: int = 0
     is_public: bool = True
     image: Optional[str] = None
+    image_set: Optional[ImageSet] = None
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    version: int = 1
+
+class RegistrationRequest(BaseModel):
+    member_id: str
+    name: Optional[str] = None
 
 class NewsArticle(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -126,15 +920,46 @@ class NewsArticle(BaseModel):
     author: str
     category: str
     image: Optional[str] = None
+    image_set: Optional[ImageSet] = None
     tags: List[str] = []
     published: bool = False
     published_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    version: int = 1
+
+# Summary views returned by list endpoints for card/grid layouts; they carry
+# only the fields those layouts render and are fetched with a matching
+# projection.
+class NewsSummary(BaseModel):
+    id: str
+    title: str
+    summary: str
+    author: str
+    category: str
+    image: Optional[str] = None
+    image_set: Optional[ImageSet] = None
+    tags: List[str] = []
+    published: bool = False
+    published_at: Optional[datetime] = None
+    created_at: datetime
+
+class PlayerCard(BaseModel):
+    id: str
+    name: str
+    team_id: str
+    jersey_number: Optional[int] = None
+    position: Optional[str] = None
+    image: Optional[str] = None
+    image_set: Optional[ImageSet] = None
+    is_active: bool = True
+    created_at: datetime
 
 class Sponsor(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     logo: Optional[str] = None
+    logo_set: Optional[ImageSet] = None
     website: Optional[str] = None
     contact_email: Optional[str] = None
     sponsorship_level: str  # "Gold", "Silver", "Bronze", etc.
@@ -143,164 +968,1142 @@ class Sponsor(BaseModel):
     start_date: Optional[date] = None
     end_date: Optional[date] = None
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    version: int = 1
 
 # Teams endpoints
 @app.get("/api/teams", response_model=List[Team])
-async def get_teams():
-    teams = []
-    async for team in teams_collection.find():
-        teams.append(Team(**team))
-    return teams
+async def get_teams(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await list_documents(request, teams_collection, Team, {}, "created_at", ASCENDING, limit, cursor, default_limit=100, fields=fields)
 
 @app.post("/api/teams", response_model=Team)
 async def create_team(team: Team):
-    team_dict = team.dict()
+    team_dict = stamp_new(team)
     await teams_collection.insert_one(team_dict)
+    await bump_marker("teams")
+    await bump_stats(total_teams=1)
     return team
 
+@app.post("/api/teams/bulk")
+async def create_teams_bulk(request: Request):
+    async def on_inserted(teams):
+        await bump_stats(total_teams=len(teams))
+    return await bulk_insert(request, teams_collection, Team, on_inserted)
+
 @app.get("/api/teams/{team_id}", response_model=Team)
-async def get_team(team_id: str):
-    team = await teams_collection.find_one({"id": team_id})
+async def get_team(request: Request, team_id: str):
+    team = await get_cached_entity("teams", teams_collection, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
-    return Team(**team)
+    return entity_response(request, team)
 
-@app.put("/api/teams/{team_id}", response_model=Team)
-async def update_team(team_id: str, team: Team):
-    team_dict = team.dict()
-    result = await teams_collection.update_one({"id": team_id}, {"$set": team_dict})
-    if result.matched_count == 0:
+# Team page in one round trip: the team, its active roster, its latest
+# results and its next fixtures, read concurrently.
+@app.get("/api/teams/{team_id}/overview")
+async def get_team_overview(team_id: str, matches: int = Query(5, ge=1, le=50)):
+    today = datetime.combine(date.today(), datetime.min.time())
+    match_projection = build_projection(Match, None, "match_date")
+    match_projection.pop("match_report")
+    team, (roster, _), (results, _), (fixtures, _) = await asyncio.gather(
+        get_cached_entity("teams", teams_collection, team_id),
+        fetch_page(
+            players_collection.reads, {"team_id": team_id, "is_active": True}, "created_at", ASCENDING,
+            MAX_PAGE_SIZE, projection=build_projection(PlayerCard, None, "created_at"),
+        ),
+        fetch_page(
+            matches_collection.reads, team_matches_query(team_id, status=MatchStatus.COMPLETED.value),
+            "match_date", DESCENDING, matches, projection=match_projection,
+        ),
+        fetch_page(
+            matches_collection.reads,
+            team_matches_query(team_id, status={"$in": [MatchStatus.SCHEDULED.value, MatchStatus.LIVE.value]}, match_date={"$gte": today}),
+            "match_date", ASCENDING, matches, projection=match_projection,
+        ),
+    )
+    if not team:
         raise HTTPException(status_code=404, detail="Team not found")
-    return team
+    return document_response({"team": team, "roster": roster, "recent_results": results, "upcoming_fixtures": fixtures})
+
+async def after_team_update(team_id: str):
+    await entity_cache.invalidate("teams", team_id)
+    stats_frames.invalidate(team_id)
+    await bump_marker("teams")
+
+@app.put("/api/teams/{team_id}", response_model=Team)
+async def update_team(request: Request, team_id: str, team: Team):
+    _, after = await update_document(request, teams_collection, "Team", team_id, team.dict(exclude=SERVER_MANAGED_FIELDS))
+    await after_team_update(team_id)
+    return updated_response(after)
+
+@app.patch("/api/teams/{team_id}", response_model=Team)
+async def patch_team(request: Request, team_id: str, changes: Dict[str, Any] = Body(...)):
+    _, after = await update_document(request, teams_collection, "Team", team_id, validate_changes(Team, changes))
+    await after_team_update(team_id)
+    return updated_response(after)
 
 @app.delete("/api/teams/{team_id}")
 async def delete_team(team_id: str):
     result = await teams_collection.delete_one({"id": team_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Team not found")
+    await entity_cache.invalidate("teams", team_id)
+    stats_frames.invalidate(team_id)
+    await bump_marker("teams")
+    await bump_stats(total_teams=-1)
     return {"message": "Team deleted successfully"}
 
 # Players endpoints
 @app.get("/api/players", response_model=List[Player])
-async def get_players(team_id: Optional[str] = None):
+async def get_players(
+    request: Request,
+    team_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[Literal["card"]] = None,
+):
     query = {"team_id": team_id} if team_id else {}
-    players = []
-    async for player in players_collection.find(query):
-        players.append(Player(**player))
-    return players
+    model = PlayerCard if view == "card" else Player
+    return await list_documents(request, players_collection, model, query, "created_at", ASCENDING, limit, cursor, default_limit=100, fields=fields)
 
 @app.post("/api/players", response_model=Player)
 async def create_player(player: Player):
-    player_dict = player.dict()
+    player_dict = stamp_new(player)
     await players_collection.insert_one(player_dict)
+    await bump_marker("players")
+    await bump_stats(total_players=int(player.is_active))
+    stats_frames.invalidate(player.team_id)
     return player
 
+@app.post("/api/players/bulk")
+async def create_players_bulk(request: Request):
+    async def on_inserted(players):
+        await bump_stats(total_players=sum(1 for player in players if player["is_active"]))
+        stats_frames.invalidate(*teams_of(players))
+    return await bulk_insert(request, players_collection, Player, on_inserted)
+
 @app.get("/api/players/{player_id}", response_model=Player)
-async def get_player(player_id: str):
-    player = await players_collection.find_one({"id": player_id})
+async def get_player(request: Request, player_id: str):
+    player = await get_cached_entity("players", players_collection, player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
-    return Player(**player)
+    return entity_response(request, player)
+
+async def after_player_update(before: Dict[str, Any], after: Dict[str, Any]):
+    await entity_cache.invalidate("players", after["id"])
+    await bump_marker("players")
+    await bump_stats(total_players=int(after.get("is_active", True)) - int(before.get("is_active", True)))
+    stats_frames.invalidate(before.get("team_id"), after.get("team_id"))
 
 @app.put("/api/players/{player_id}", response_model=Player)
-async def update_player(player_id: str, player: Player):
-    player_dict = player.dict()
-    result = await players_collection.update_one({"id": player_id}, {"$set": player_dict})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Player not found")
-    return player
+async def update_player(request: Request, player_id: str, player: Player):
+    before, after = await update_document(request, players_collection, "Player", player_id, player.dict(exclude=SERVER_MANAGED_FIELDS))
+    await after_player_update(before, after)
+    return updated_response(after)
+
+@app.patch("/api/players/{player_id}", response_model=Player)
+async def patch_player(request: Request, player_id: str, changes: Dict[str, Any] = Body(...)):
+    before, after = await update_document(request, players_collection, "Player", player_id, validate_changes(Player, changes))
+    await after_player_update(before, after)
+    return updated_response(after)
 
 # Matches endpoints
+def team_matches_query(team_id: str, **conditions) -> Dict[str, Any]:
+    # One branch per side, each served by its (side, match_date, id) index.
+    return {"$or": [
+        {"home_team_id": team_id, **conditions},
+        {"away_team_id": team_id, **conditions},
+    ]}
+
 @app.get("/api/matches", response_model=List[Match])
-async def get_matches(limit: int = 50):
-    matches = []
-    async for match in matches_collection.find().sort("match_date", -1).limit(limit):
-        matches.append(Match(**match))
-    return matches
+async def get_matches(
+    request: Request,
+    team_id: Optional[str] = None,
+    season: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    collection = matches_archive_collection if await season_is_closed(season) else matches_collection
+    conditions = {"season": season} if season else {}
+    query = team_matches_query(team_id, **conditions) if team_id else conditions
+    return await list_documents(request, collection, Match, query, "match_date", DESCENDING, limit, cursor, default_limit=50, fields=fields)
 
 @app.post("/api/matches", response_model=Match)
 async def create_match(match: Match):
-    match_dict = match.dict()
+    await reject_closed_season(match.season)
+    match_dict = stamp_new(match)
     await matches_collection.insert_one(match_dict)
+    await bump_marker("matches")
+    await bump_calendar_markers(match_dict)
+    await bump_upcoming_matches(None, match_dict)
+    await apply_standings_changes([(None, match_dict)])
     return match
 
+@app.post("/api/matches/bulk")
+async def create_matches_bulk(request: Request):
+    async def on_inserted(matches):
+        upcoming = [as_stored_datetime(match["match_date"]) for match in matches if counts_as_upcoming(match)]
+        await bump_stats(next_kickoff=min(upcoming, default=None), upcoming_matches=len(upcoming))
+        await apply_standings_changes((None, match) for match in matches)
+        await bump_calendar_markers(*matches)
+
+    async def reject_closed_seasons(matches):
+        seasons = {match["season"] for match in matches if match.get("season")}
+        closed = {season for season in seasons if await season_is_closed(season)}
+        return {
+            index: f"Season {match['season']} is closed"
+            for index, match in enumerate(matches) if match.get("season") in closed
+        }
+    return await bulk_insert(request, matches_collection, Match, on_inserted, reject_closed_seasons)
+
 @app.get("/api/matches/{match_id}", response_model=Match)
-async def get_match(match_id: str):
-    match = await matches_collection.find_one({"id": match_id})
+async def get_match(request: Request, match_id: str):
+    match = await entity_cache.get_or_load("matches", match_id, lambda: find_match(match_id))
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
-    return Match(**match)
+    return entity_response(request, match)
+
+async def after_match_update(before: Dict[str, Any], after: Dict[str, Any]):
+    await entity_cache.invalidate("matches", after["id"])
+    await bump_marker("matches")
+    await bump_calendar_markers(before, after)
+    await bump_upcoming_matches(before, after)
+    await apply_standings_changes([(before, after)])
+    publish_match_update(after)
 
 @app.put("/api/matches/{match_id}", response_model=Match)
-async def update_match(match_id: str, match: Match):
-    match_dict = match.dict()
-    result = await matches_collection.update_one({"id": match_id}, {"$set": match_dict})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Match not found")
-    return match
+async def update_match(request: Request, match_id: str, match: Match):
+    await reject_closed_season(match.season)
+    before, after = await update_hot_match(request, match_id, match.dict(exclude=SERVER_MANAGED_FIELDS))
+    await after_match_update(before, after)
+    return updated_response(after)
+
+@app.patch("/api/matches/{match_id}", response_model=Match)
+async def patch_match(request: Request, match_id: str, changes: Dict[str, Any] = Body(...)):
+    changes = validate_changes(Match, changes)
+    await reject_closed_season(changes.get("season"))
+    before, after = await update_hot_match(request, match_id, changes)
+    await after_match_update(before, after)
+    return updated_response(after)
+
+# Live match updates
+# Fans follow a match over SSE (/api/matches/{id}/live) or a WebSocket
+# (/api/matches/{id}/ws). update_match publishes the new score to the
+# in-process broker, which fans it out to every subscriber of that match, so
+# the database sees one write per score change however many fans watch.
+# With LIVE_CHANGE_STREAMS=1 each worker instead follows a MongoDB change
+# stream on matches (replica set required), so writes made through any worker
+# reach subscribers on all of them.
+LIVE_CHANGE_STREAMS = os.environ.get('LIVE_CHANGE_STREAMS', '0') == '1'
+LIVE_KEEPALIVE_SECONDS = float(os.environ.get('LIVE_KEEPALIVE_SECONDS', '15'))
+LIVE_FIELDS = ("id", "home_team_name", "away_team_name", "home_score", "away_score", "status", "match_date")
+match_broker = MatchBroker()
+_change_stream_task: Optional[asyncio.Task] = None
+
+def live_payload(match: Dict[str, Any]) -> bytes:
+    return orjson.dumps({field: match.get(field) for field in LIVE_FIELDS})
+
+def live_key(match_id: str) -> Tuple[Optional[str], str]:
+    # Match ids are only unique within a club, so broker keys include it.
+    return (current_tenant.get(), match_id)
+
+def publish_match_update(match: Dict[str, Any]):
+    if not LIVE_CHANGE_STREAMS:
+        match_broker.publish(live_key(match["id"]), live_payload(match))
+
+async def match_snapshot(match_id: str) -> bytes:
+    payload = match_broker.latest(live_key(match_id))
+    if payload is None:
+        match = await matches_collection.find_one({"id": match_id}, {"_id": 0, **{field: 1 for field in LIVE_FIELDS}})
+        if not match:
+            raise HTTPException(status_code=404, detail="Match not found")
+        payload = live_payload(match)
+        match_broker.remember(live_key(match_id), payload)
+    return payload
+
+@app.get("/api/matches/{match_id}/live")
+async def stream_match_live(match_id: str):
+    # Subscribe before reading the snapshot so no update can fall in between.
+    key = live_key(match_id)
+    queue = match_broker.subscribe(key)
+    try:
+        snapshot = await match_snapshot(match_id)
+    except BaseException:
+        match_broker.unsubscribe(key, queue)
+        raise
+
+    async def events():
+        try:
+            yield format_sse(snapshot)
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield format_sse(payload)
+        finally:
+            match_broker.unsubscribe(key, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/api/matches/{match_id}/ws")
+async def match_live_websocket(websocket: WebSocket, match_id: str):
+    key = live_key(match_id)
+    queue = match_broker.subscribe(key)
+    try:
+        try:
+            snapshot = await match_snapshot(match_id)
+        except HTTPException:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        await websocket.send_bytes(snapshot)
+
+        async def pump():
+            while True:
+                await websocket.send_bytes(await queue.get())
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            # Clients do not send anything; receiving only detects disconnects.
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        except WebSocketDisconnect:
+            pass
+        finally:
+            pump_task.cancel()
+    finally:
+        match_broker.unsubscribe(key, queue)
+
+def watch_matches(pipeline: List[Dict[str, Any]], **options):
+    if TENANCY == "off":
+        return matches_collection.watch(pipeline, **options)
+    # One stream for every club's matches collection; the club of each change
+    # is read back from its database name (see change_tenant).
+    namespace = {"ns.coll": "matches", "ns.db": {"$regex": f"^{re.escape(mongo.tenant_prefix)}"}}
+    return mongo.open().watch([{"$match": namespace}, *pipeline], **options)
+
+def change_tenant(change: Dict[str, Any]) -> Optional[str]:
+    if TENANCY == "off":
+        return None
+    database = change["ns"]["db"]
+    return database[len(mongo.tenant_prefix):] if database.startswith(mongo.tenant_prefix) else None
+
+async def follow_match_changes():
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+    resume_token = None
+    while True:
+        try:
+            async with watch_matches(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    match = change.get("fullDocument")
+                    if not match:
+                        continue
+                    key = (change_tenant(change), match["id"])
+                    if match_broker.has_subscribers(key):
+                        match_broker.publish(key, live_payload(match))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Match change stream interrupted, resuming")
+            await asyncio.sleep(1)
+
+async def start_match_change_stream():
+    global _change_stream_task
+    if LIVE_CHANGE_STREAMS:
+        _change_stream_task = asyncio.create_task(follow_match_changes())
+
+async def stop_match_change_stream():
+    if _change_stream_task is not None:
+        _change_stream_task.cancel()
 
 # Events endpoints
 @app.get("/api/events", response_model=List[Event])
-async def get_events(limit: int = 20):
-    events = []
-    async for event in events_collection.find().sort("event_date", 1).limit(limit):
-        events.append(Event(**event))
-    return events
+async def get_events(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await list_documents(request, events_collection, Event, {}, "event_date", ASCENDING, limit, cursor, default_limit=20, fields=fields)
 
 @app.post("/api/events", response_model=Event)
 async def create_event(event: Event):
-    event_dict = event.dict()
+    event_dict = stamp_new(event)
     await events_collection.insert_one(event_dict)
+    await bump_marker("events", "calendar:events")
     return event
 
+@app.post("/api/events/bulk")
+async def create_events_bulk(request: Request):
+    async def on_inserted(events):
+        await bump_marker("calendar:events")
+    return await bulk_insert(request, events_collection, Event, on_inserted)
+
+# Event registration
+# A seat is taken with one conditional $inc on the event that only matches
+# while current_participants is below max_participants, so concurrent sign-ups
+# can never overbook and nothing is locked or retried. The unique
+# (event_id, member_id) key on event_registrations makes registering twice a
+# no-op. Members who miss a seat are waitlisted in arrival order; every freed
+# seat, and every new waitlist entry, is followed by promote_waitlist(), which
+# claims a seat first and then hands it to the head of the waitlist (or gives
+# it back when nobody is waiting).
+REGISTERED, WAITLISTED, PENDING = "registered", "waitlisted", "pending"
+
+def has_free_seat(event_id: str) -> Dict[str, Any]:
+    return {
+        "id": event_id,
+        "$or": [
+            {"max_participants": None},
+            {"$expr": {"$lt": ["$current_participants", "$max_participants"]}},
+        ],
+    }
+
+async def claim_seat(event_id: str) -> bool:
+    event = await events_collection.find_one_and_update(
+        has_free_seat(event_id),
+        {"$inc": {"current_participants": 1}, "$set": {"updated_at": datetime.now()}},
+        projection={"_id": 1},
+    )
+    return event is not None
+
+async def release_seat(event_id: str):
+    await events_collection.update_one(
+        {"id": event_id, "current_participants": {"$gt": 0}},
+        {"$inc": {"current_participants": -1}, "$set": {"updated_at": datetime.now()}},
+    )
+
+async def seats_changed(event_id: str):
+    # Only the events list shows seat counts. The calendar feed has its own
+    # marker and an event's version is its iCalendar SEQUENCE, so neither
+    # changes with every sign-up.
+    await bump_marker("events")
+
+async def promote_waitlist(event_id: str) -> int:
+    promoted = 0
+    while await claim_seat(event_id):
+        registration = await registrations_collection.find_one_and_update(
+            {"event_id": event_id, "status": WAITLISTED},
+            {"$set": {"status": REGISTERED, "updated_at": datetime.now()}},
+            sort=[("created_at", ASCENDING), ("_id", ASCENDING)],
+        )
+        if registration is None:
+            await release_seat(event_id)
+            break
+        promoted += 1
+    if promoted:
+        await seats_changed(event_id)
+    return promoted
+
+async def waitlist_position(registration: Dict[str, Any]) -> int:
+    ahead = await registrations_collection.count_documents({
+        "event_id": registration["event_id"],
+        "status": WAITLISTED,
+        "$or": [
+            {"created_at": {"$lt": registration["created_at"]}},
+            {"created_at": registration["created_at"], "_id": {"$lt": registration["_id"]}},
+        ],
+    })
+    return ahead + 1
+
+async def registration_response(registration: Dict[str, Any]) -> Dict[str, Any]:
+    response = {
+        "event_id": registration["event_id"],
+        "member_id": registration["member_id"],
+        "status": registration["status"],
+    }
+    if registration["status"] == WAITLISTED:
+        response["waitlist_position"] = await waitlist_position(registration)
+    return response
+
+@app.post("/api/events/{event_id}/register")
+async def register_for_event(event_id: str, registration: RegistrationRequest):
+    if await events_collection.find_one({"id": event_id}, {"_id": 1}) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    now = datetime.now()
+    doc = {**registration.dict(), "event_id": event_id, "status": PENDING, "created_at": now, "updated_at": now}
+    try:
+        await registrations_collection.insert_one(doc)
+    except DuplicateKeyError:
+        existing = await registrations_collection.find_one({"event_id": event_id, "member_id": registration.member_id})
+        if existing is not None and existing["status"] != PENDING:
+            return await registration_response(existing)
+        # A concurrent request for the same member is still placing it.
+        return {"event_id": event_id, "member_id": registration.member_id, "status": PENDING}
+    status = REGISTERED if await claim_seat(event_id) else WAITLISTED
+    placed = await registrations_collection.update_one(
+        {"_id": doc["_id"], "status": PENDING}, {"$set": {"status": status, "updated_at": datetime.now()}}
+    )
+    if placed.matched_count == 0:
+        # Unregistered while pending: hand the seat on.
+        if status == REGISTERED:
+            await release_seat(event_id)
+            await promote_waitlist(event_id)
+        return {"event_id": event_id, "member_id": registration.member_id, "status": "unregistered"}
+    if status == REGISTERED:
+        await seats_changed(event_id)
+    else:
+        # A seat freed between the failed claim and the waitlist write would
+        # otherwise stay empty.
+        await promote_waitlist(event_id)
+    doc["status"] = status
+    current = await registrations_collection.find_one({"_id": doc["_id"]})
+    return await registration_response(current or doc)
+
+@app.post("/api/events/{event_id}/unregister")
+async def unregister_from_event(event_id: str, registration: RegistrationRequest):
+    removed = await registrations_collection.find_one_and_delete(
+        {"event_id": event_id, "member_id": registration.member_id}
+    )
+    if removed is None:
+        return {"event_id": event_id, "member_id": registration.member_id, "status": "unregistered"}
+    if removed["status"] == REGISTERED:
+        await release_seat(event_id)
+        await seats_changed(event_id)
+        await promote_waitlist(event_id)
+    return {"event_id": event_id, "member_id": registration.member_id, "status": "unregistered"}
+
 # News endpoints
 @app.get("/api/news", response_model=List[NewsArticle])
-async def get_news(published_only: bool = True, limit: int = 10):
+async def get_news(
+    request: Request,
+    published_only: bool = True,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[Literal["summary"]] = None,
+    archived: bool = False,
+):
     query = {"published": True} if published_only else {}
-    news = []
-    async for article in news_collection.find(query).sort("created_at", -1).limit(limit):
-        news.append(NewsArticle(**article))
-    return news
+    model = NewsSummary if view == "summary" else NewsArticle
+    collection = news_archive_collection if archived else news_collection
+    return await list_documents(request, collection, model, query, "created_at", DESCENDING, limit, cursor, default_limit=10, fields=fields)
 
 @app.post("/api/news", response_model=NewsArticle)
 async def create_news(article: NewsArticle):
-    article_dict = article.dict()
+    article_dict = stamp_new(article)
     await news_collection.insert_one(article_dict)
+    await bump_marker("news")
+    await bump_stats(recent_news=int(article.published))
+    await schedule_publication(article_dict)
     return article
 
+@app.post("/api/news/bulk")
+async def create_news_bulk(request: Request):
+    async def on_inserted(articles):
+        await bump_stats(recent_news=sum(1 for article in articles if article["published"]))
+        await asyncio.gather(*(schedule_publication(article) for article in articles))
+    return await bulk_insert(request, news_collection, NewsArticle, on_inserted)
+
+# Scheduled publication
+# An unpublished article with a published_at is published by a "publish-news"
+# job due at that time, keyed by article so scheduling it again replaces the
+# pending job. Startup re-enqueues every scheduled article, which covers jobs
+# an in-memory queue lost on restart.
+async def schedule_publication(article: Dict[str, Any]):
+    if article.get("published") or not article.get("published_at"):
+        return
+    await task_queue.enqueue(
+        "publish-news", {"article_id": article["id"]},
+        run_at=as_stored_datetime(article["published_at"]), key=f"publish-news:{article['id']}",
+    )
+
+async def schedule_pending_publications():
+    async for article in news_collection.find(
+        {"published": False, "published_at": {"$ne": None}}, {"_id": 0, "id": 1, "published": 1, "published_at": 1}
+    ):
+        await schedule_publication(article)
+
+@task_queue.task("publish-news")
+async def publish_news(article_id: str):
+    result = await news_collection.update_one(
+        {"id": article_id, "published": False},
+        {"$set": {"published": True, "updated_at": datetime.now()}, "$inc": {"version": 1}},
+    )
+    if result.modified_count:
+        await bump_marker("news")
+        await bump_stats(recent_news=1)
+
 # Sponsors endpoints
 @app.get("/api/sponsors", response_model=List[Sponsor])
-async def get_sponsors(active_only: bool = True):
+async def get_sponsors(
+    request: Request,
+    active_only: bool = True,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     query = {"active": True} if active_only else {}
-    sponsors = []
-    async for sponsor in sponsors_collection.find(query):
-        sponsors.append(Sponsor(**sponsor))
-    return sponsors
+    return await list_documents(request, sponsors_collection, Sponsor, query, "created_at", ASCENDING, limit, cursor, default_limit=100, fields=fields)
 
 @app.post("/api/sponsors", response_model=Sponsor)
 async def create_sponsor(sponsor: Sponsor):
-    sponsor_dict = sponsor.dict()
+    sponsor_dict = stamp_new(sponsor)
     await sponsors_collection.insert_one(sponsor_dict)
+    await bump_marker("sponsors")
     return sponsor
 
 # Dashboard stats endpoint
 @app.get("/api/stats")
 async def get_dashboard_stats():
-    total_teams = await teams_collection.count_documents({})
-    total_players = await players_collection.count_documents({"is_active": True})
-    upcoming_matches = await matches_collection.count_documents({
-        "status": "scheduled",
-        "match_date": {"$gte": datetime.now()}
-    })
-    recent_news = await news_collection.count_documents({"published": True})
-    
+    stats = await read_stats()
     return {
-        "total_teams": total_teams,
-        "total_players": total_players,
-        "upcoming_matches": upcoming_matches,
-        "recent_news": recent_news
+        "total_teams": stats.get("total_teams", 0),
+        "total_players": stats.get("total_players", 0),
+        "upcoming_matches": stats.get("upcoming_matches", 0),
+        "recent_news": stats.get("recent_news", 0)
     }
 
+# Homepage bootstrap endpoint
+# The homepage payload is shared by every visitor, so it is rendered once per
+# HOME_CACHE_TTL seconds; concurrent misses wait on the lock instead of each
+# running their own database pass.
+HOME_CACHE_TTL = float(os.environ.get('HOME_CACHE_TTL', '5'))
+_home_caches = TenantLocal(lambda: {"body": None, "etag": None, "expires": 0.0, "lock": asyncio.Lock()})
+
+async def build_home_payload() -> Dict[str, Any]:
+    (teams, _), (matches, _), (news, _), (events, _), stats = await asyncio.gather(
+        fetch_page(teams_collection.reads, {}, "created_at", ASCENDING, 100, projection=build_projection(Team, None, "created_at")),
+        fetch_page(matches_collection.reads, {}, "match_date", DESCENDING, 5, projection=build_projection(Match, None, "match_date")),
+        fetch_page(news_collection.reads, {"published": True}, "created_at", DESCENDING, 3, projection=build_projection(NewsArticle, None, "created_at")),
+        fetch_page(events_collection.reads, {}, "event_date", ASCENDING, 5, projection=build_projection(Event, None, "event_date")),
+        get_dashboard_stats(),
+    )
+    return {
+        "teams": teams,
+        "matches": matches,
+        "news": news,
+        "events": events,
+        "stats": stats,
+    }
+
+@app.get("/api/home")
+async def get_home(request: Request):
+    _home_cache = _home_caches.current()
+    if _home_cache["body"] is None or time.monotonic() >= _home_cache["expires"]:
+        async with _home_cache["lock"]:
+            if _home_cache["body"] is None or time.monotonic() >= _home_cache["expires"]:
+                payload = await build_home_payload()
+                _home_cache["body"] = orjson.dumps(payload)
+                _home_cache["etag"] = '"' + hashlib.sha1(_home_cache["body"]).hexdigest() + '"'
+                _home_cache["expires"] = time.monotonic() + HOME_CACHE_TTL
+    headers = {"ETag": _home_cache["etag"], "Cache-Control": LIST_CACHE_CONTROL}
+    if is_not_modified(request, _home_cache["etag"], None):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_home_cache["body"], media_type="application/json", headers=headers)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/tasks/stats")
+async def get_task_stats():
+    return await task_queue.stats()
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return entity_cache.stats()
+
+# League standings
+# The standings collection holds one row of raw counts per (season,
+# competition, team). Match writes apply the difference between the old and
+# new version of the match, so moving a match to COMPLETED or correcting a
+# score touches two rows instead of re-aggregating the season. Points are
+# derived on read from the sport's point system (STANDINGS_POINTS, a JSON
+# object overriding DEFAULT_POINT_SYSTEMS per sport). rebuild_standings()
+# recomputes the table from scratch and reports where it disagrees with the
+# incremental rows (see manage.py rebuild-standings).
+POINT_SYSTEMS = {**DEFAULT_POINT_SYSTEMS, **json.loads(os.environ.get('STANDINGS_POINTS', '{}'))}
+
+def standing_filter(key) -> Dict[str, Any]:
+    season, competition, team_id = key
+    return {"season": season, "competition": competition, "team_id": team_id}
+
+async def apply_standings_changes(changes):
+    delta = standings_delta(changes)
+    if not delta:
+        return
+    operations = []
+    for key, entry in delta.items():
+        update: Dict[str, Any] = {"$inc": entry["inc"]}
+        if entry["meta"] is not None:
+            update["$set"] = entry["meta"]
+        operations.append(UpdateOne(standing_filter(key), update, upsert=True))
+    await standings_collection.bulk_write(operations, ordered=False)
+    await standings_collection.delete_many({
+        "$or": [standing_filter(key) for key in delta],
+        "played": {"$lte": 0},
+    })
+    await bump_marker("standings")
+
+async def rebuild_standings(apply: bool = True) -> Dict[str, Any]:
+    # Closed seasons keep their rows, so archived matches count too. Keyed by
+    # id, so a match caught between the copy and delete passes counts once.
+    completed = {}
+    for collection in (matches_archive_collection, matches_collection):
+        async for match in collection.find(
+            {"status": MatchStatus.COMPLETED},
+            {"_id": 0, "id": 1, "season": 1, "competition": 1, "sport": 1, "status": 1, "home_score": 1, "away_score": 1,
+             "home_team_id": 1, "away_team_id": 1, "home_team_name": 1, "away_team_name": 1},
+        ):
+            completed[match["id"]] = match
+    expected = compute_standings(list(completed.values()))
+    current = {
+        (row["season"], row["competition"], row["team_id"]): row
+        async for row in standings_collection.find({}, {"_id": 0})
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(current), key=str):
+        want = {field: expected.get(key, {}).get(field, 0) for field in STAT_FIELDS}
+        have = {field: current.get(key, {}).get(field, 0) for field in STAT_FIELDS}
+        if want != have:
+            mismatches.append({**standing_filter(key), "expected": want, "actual": have})
+    if apply and mismatches:
+        await standings_collection.delete_many({})
+        if expected:
+            await standings_collection.insert_many(list(expected.values()))
+        await bump_marker("standings")
+    return {"rows": len(expected), "mismatches": mismatches}
+
+@app.get("/api/standings")
+async def get_standings(request: Request, season: Optional[str] = None, competition: Optional[str] = None):
+    session = await mongo.read_session()
+    try:
+        marker = await read_marker("standings", session)
+        headers = validator_headers(list_etag(marker, request), marker["updated_at"])
+        if is_not_modified(request, headers["ETag"], marker["updated_at"]):
+            return Response(status_code=304, headers=headers)
+        rows = await standings_collection.reads.find(
+            {"season": season, "competition": competition}, {"_id": 0}, session=session
+        ).to_list(None)
+    finally:
+        if session is not None:
+            await session.end_session()
+    response = document_response({
+        "season": season,
+        "competition": competition,
+        "table": rank_table(rows, POINT_SYSTEMS),
+    })
+    response.headers.update(headers)
+    return response
+
+# Season archive
+# Closing a season (manage.py close-season) moves its matches into
+# matches_archive, and news older than NEWS_ARCHIVE_DAYS (or a given date)
+# into news_archive, so the hot collections and their indexes only hold the
+# current working set. A season can only be closed once none of its matches
+# is scheduled or live. Matches are copied first, the season is then recorded
+# as closed in the seasons collection and only then removed from matches, so
+# ?season= reads switch to the complete archive in one step. Closed seasons are
+# read-only: match writes naming one, or aimed at an archived match, get 409.
+# /api/matches/{id} falls back to the archive, and /api/news?archived=true
+# lists archived articles.
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
+NEWS_ARCHIVE_DAYS = int(os.environ.get('NEWS_ARCHIVE_DAYS', '365'))
+# A season never reopens, so only positive lookups are remembered.
+_closed_seasons = TenantLocal(set)
+
+async def season_is_closed(season: Optional[str]) -> bool:
+    if not season:
+        return False
+    if season in _closed_seasons.current():
+        return True
+    if await seasons_collection.find_one({"_id": season}, {"_id": 1}) is None:
+        return False
+    _closed_seasons.add(season)
+    return True
+
+async def reject_closed_season(season: Optional[str]):
+    if await season_is_closed(season):
+        raise HTTPException(status_code=409, detail=f"Season {season} is closed")
+
+async def find_match(match_id: str) -> Optional[Dict[str, Any]]:
+    match = await matches_collection.find_one({"id": match_id}, {"_id": 0})
+    if match is None:
+        match = await matches_archive_collection.find_one({"id": match_id}, {"_id": 0})
+    return match
+
+async def update_hot_match(request: Request, match_id: str, changes: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    try:
+        return await update_document(request, matches_collection, "Match", match_id, changes)
+    except HTTPException as exc:
+        if exc.status_code == 404:
+            archived = await matches_archive_collection.find_one({"id": match_id}, {"_id": 0, "season": 1})
+            if archived is not None:
+                raise HTTPException(status_code=409, detail=f"Season {archived.get('season')} is closed")
+        raise
+
+async def close_season(season: str, news_before: Optional[datetime] = None) -> Dict[str, Any]:
+    unfinished = await matches_collection.count_documents(
+        {"season": season, "status": {"$in": [MatchStatus.SCHEDULED, MatchStatus.LIVE]}}
+    )
+    if unfinished:
+        return {"season": season, "closed": False, "unfinished": unfinished, "matches": 0, "news": 0}
+    query = {"season": season}
+    team_ids = set(await matches_collection.distinct("home_team_id", query)) \
+        | set(await matches_collection.distinct("away_team_id", query))
+    await copy_documents(matches_collection, matches_archive_collection, query, ARCHIVE_BATCH_SIZE)
+    await seasons_collection.update_one(
+        {"_id": season}, {"$setOnInsert": {"closed_at": datetime.now()}}, upsert=True
+    )
+    _closed_seasons.add(season)
+    matches = await delete_archived(matches_collection, matches_archive_collection, query, ARCHIVE_BATCH_SIZE)
+
+    news_before = news_before or datetime.now() - timedelta(days=NEWS_ARCHIVE_DAYS)
+    news_query = {"created_at": {"$lt": news_before}}
+    await copy_documents(news_collection, news_archive_collection, news_query, ARCHIVE_BATCH_SIZE)
+    published = await news_collection.count_documents({**news_query, "published": True})
+    news = await delete_archived(news_collection, news_archive_collection, news_query, ARCHIVE_BATCH_SIZE)
+
+    await bump_stats(recent_news=-published)
+    await bump_marker("matches", "matches_archive", "news", "news_archive")
+    await bump_team_calendar_markers(sorted(team_ids))
+    return {"season": season, "closed": True, "unfinished": 0, "matches": matches, "news": news}
+
+# Player leaderboards
+# Player.stats are kept as per-team pandas frames (see leaderboards.py).
+# Player writes invalidate only the teams they touch, and team writes the
+# team itself (its sport is a column), so a query after a roster change
+# reloads one team rather than every player. Writes made by other workers,
+# manage.py or other pods are not seen by those invalidations; frames are
+# reloaded in full once they are STATS_FRAMES_MAX_AGE seconds old.
+STATS_FRAMES_MAX_AGE = float(os.environ.get('STATS_FRAMES_MAX_AGE', '30'))
+
+async def load_player_stats(team_ids: Optional[List[str]]) -> List[Dict[str, Any]]:
+    query = {"team_id": {"$in": team_ids}} if team_ids is not None else {}
+    projection = {"_id": 0, "id": 1, "name": 1, "team_id": 1, "is_active": 1, "stats": 1}
+    return await players_collection.find(query, projection).to_list(None)
+
+async def load_team_sports(team_ids: Optional[List[str]]) -> Dict[str, str]:
+    query = {"id": {"$in": team_ids}} if team_ids is not None else {}
+    return {team["id"]: team["sport"] async for team in teams_collection.find(query, {"_id": 0, "id": 1, "sport": 1})}
+
+stats_frames = TenantLocal(lambda: StatsFrameCache(load_player_stats, load_team_sports, max_age=STATS_FRAMES_MAX_AGE))
+
+@app.get("/api/leaderboards")
+async def get_leaderboard(
+    stat: str,
+    team_id: Optional[str] = None,
+    sport: Optional[SportType] = None,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    per_game: bool = False,
+    games_stat: str = "games",
+    active_only: bool = True,
+    ascending: bool = False,
+):
+    frame = await stats_frames.frame(team_id)
+    result = leaderboard(
+        frame, stat, limit,
+        sport=sport.value if sport else None,
+        games_stat=games_stat,
+        per_game=per_game,
+        active_only=active_only,
+        ascending=ascending,
+    )
+    result.update(team_id=team_id, sport=sport)
+    return result
+
+@app.get("/api/leaderboards/stats")
+async def get_leaderboard_stats(team_id: Optional[str] = None):
+    return {"team_id": team_id, "stats": available_stats(await stats_frames.frame(team_id))}
+
+# Search
+# /api/search runs a $text query against the weighted text index of each
+# searchable collection concurrently, then merges the hits by text score.
+# Pages are cut from the merged ranking, so each collection is asked for at
+# most page * limit hits; SEARCH_MAX_DEPTH bounds how deep clients can page.
+SEARCH_MAX_DEPTH = int(os.environ.get('SEARCH_MAX_DEPTH', '500'))
+SEARCH_TARGETS = {
+    "news": (news_collection, {"published": True}, ("id", "title", "summary", "category", "image", "image_set", "created_at")),
+    "teams": (teams_collection, {}, ("id", "name", "sport", "category", "image", "image_set")),
+    "players": (players_collection, {}, ("id", "name", "team_id", "position", "image", "image_set")),
+    "events": (events_collection, {"is_public": True}, ("id", "title", "event_type", "event_date", "location", "image", "image_set")),
+}
+
+async def search_collection(kind: str, q: str, depth: int) -> List[Dict[str, Any]]:
+    collection, query, fields = SEARCH_TARGETS[kind]
+    projection = {"_id": 0, "score": {"$meta": "textScore"}, **{field: 1 for field in fields}}
+    cursor = collection.reads.find({"$text": {"$search": q}, **query}, projection) \
+        .sort([("score", {"$meta": "textScore"})]) \
+        .limit(depth)
+    return [{"type": kind, **doc} async for doc in cursor]
+
+@app.get("/api/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    page: int = Query(1, ge=1),
+):
+    kinds = [kind.strip() for kind in types.split(",") if kind.strip()] if types else list(SEARCH_TARGETS)
+    unknown = set(kinds) - set(SEARCH_TARGETS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+    depth = page * limit
+    if depth > SEARCH_MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"Search results are limited to the first {SEARCH_MAX_DEPTH} hits")
+    # One extra hit tells whether another page exists.
+    hits = await asyncio.gather(*(search_collection(kind, q, depth + 1) for kind in kinds))
+    ranked = sorted((hit for kind_hits in hits for hit in kind_hits), key=lambda hit: -hit["score"])
+    return document_response({
+        "query": q,
+        "page": page,
+        "limit": limit,
+        "results": ranked[depth - limit:depth],
+        "has_more": len(ranked) > depth and depth < SEARCH_MAX_DEPTH,
+    })
+
+# Calendar feeds
+# /api/calendar/events.ics and /api/calendar/{team_id}.ics serve iCalendar
+# feeds over a date window (from/to, defaulting to CALENDAR_PAST_DAYS back and
+# CALENDAR_FUTURE_DAYS ahead, rounded to the day so the default URL maps to one
+# cache entry per day). Rendered feeds are kept in calendar_cache alongside
+# the ETag they were built for; the ETag hashes the change marker the feed
+# depends on ("calendar:events", bumped by event writes but not by seat
+# changes, or "calendar:{team_id}" which a job bumps after match writes for
+# every team they touch), so a stale entry is simply never matched again.
+# Misses stream the feed as the cursor is read and store it once complete.
+CALENDAR_PAST_DAYS = int(os.environ.get('CALENDAR_PAST_DAYS', '180'))
+CALENDAR_FUTURE_DAYS = int(os.environ.get('CALENDAR_FUTURE_DAYS', '365'))
+CALENDAR_MATCH_MINUTES = int(os.environ.get('CALENDAR_MATCH_MINUTES', '120'))
+CALENDAR_EVENT_MINUTES = int(os.environ.get('CALENDAR_EVENT_MINUTES', '120'))
+CALENDAR_CACHE_ENTRIES = int(os.environ.get('CALENDAR_CACHE_ENTRIES', '1000'))
+CALENDAR_CACHE_TTL = float(os.environ.get('CALENDAR_CACHE_TTL', '86400'))
+CALENDAR_MEDIA_TYPE = "text/calendar; charset=utf-8"
+calendar_cache = MemoryCache(CALENDAR_CACHE_ENTRIES)
+
+def calendar_window(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    today = datetime.combine(date.today(), datetime.min.time())
+    start = as_stored_datetime(start) if start else today - timedelta(days=CALENDAR_PAST_DAYS)
+    end = as_stored_datetime(end) if end else today + timedelta(days=CALENDAR_FUTURE_DAYS + 1)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    return start, end
+
+async def bump_calendar_markers(*matches: Optional[Dict[str, Any]]):
+    # One marker per team; a bulk import can touch every team, so the bumps
+    # run as a job rather than in the request.
+    team_ids = sorted({match[side] for match in matches if match for side in ("home_team_id", "away_team_id")})
+    if team_ids:
+        await task_queue.enqueue("bump-calendar-markers", {"team_ids": team_ids})
+
+@task_queue.task("bump-calendar-markers")
+async def bump_team_calendar_markers(team_ids: List[str]):
+    await asyncio.gather(*(bump_marker(f"calendar:{team_id}") for team_id in team_ids))
+
+def match_vevent(match: Dict[str, Any]) -> bytes:
+    summary = f"{match['home_team_name']} vs {match['away_team_name']}"
+    if match.get("home_score") is not None and match.get("away_score") is not None:
+        summary = f"{match['home_team_name']} {match['home_score']}-{match['away_score']} {match['away_team_name']}"
+    description = " - ".join(part for part in (match.get("competition"), match.get("season")) if part)
+    return vevent(
+        uid=f"match-{match['id']}@sports-club",
+        start=match["match_date"],
+        end=match["match_date"] + timedelta(minutes=CALENDAR_MATCH_MINUTES),
+        summary=summary,
+        stamp=match.get("updated_at") or match["created_at"],
+        sequence=match.get("version", 0),
+        location=match.get("venue"),
+        description=description or None,
+        status="CANCELLED" if match.get("status") == MatchStatus.CANCELLED else "CONFIRMED",
+    )
+
+def event_vevent(event: Dict[str, Any]) -> bytes:
+    return vevent(
+        uid=f"event-{event['id']}@sports-club",
+        start=event["event_date"],
+        end=event.get("end_date") or event["event_date"] + timedelta(minutes=CALENDAR_EVENT_MINUTES),
+        summary=event["title"],
+        stamp=event.get("updated_at") or event["created_at"],
+        sequence=event.get("version", 0),
+        location=event.get("location"),
+        description=event.get("description"),
+    )
+
+async def calendar_response(
+    request: Request,
+    name: str,
+    marker_name: str,
+    extra_key: str,
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    render: Callable[[Dict[str, Any]], bytes],
+) -> Response:
+    marker = await read_marker(marker_name)
+    updated_at = marker["updated_at"].isoformat() if marker["updated_at"] else ""
+    cache_key = f"{current_tenant.get()}|{request.url.path}|{extra_key}|{query}"
+    etag = '"' + hashlib.sha1(f"{cache_key}|{marker['version']}|{updated_at}".encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if marker["updated_at"] is not None:
+        headers["Last-Modified"] = http_date(marker["updated_at"])
+    if is_not_modified(request, etag, marker["updated_at"]):
+        return Response(status_code=304, headers=headers)
+    cached = await calendar_cache.get(cache_key)
+    if cached is not None and cached[0] == etag:
+        return Response(content=cached[1], media_type=CALENDAR_MEDIA_TYPE, headers=headers)
+
+    async def render_feed() -> AsyncIterator[bytes]:
+        header = calendar_header(name)
+        chunks = [header]
+        yield header
+        async for doc in collection.find(query, {"_id": 0}).sort([(sort_field, ASCENDING), ("id", ASCENDING)]):
+            chunk = render(doc)
+            chunks.append(chunk)
+            yield chunk
+        chunks.append(CALENDAR_FOOTER)
+        yield CALENDAR_FOOTER
+        await calendar_cache.set(cache_key, (etag, b"".join(chunks)), ttl=CALENDAR_CACHE_TTL)
+
+    return StreamingResponse(render_feed(), media_type=CALENDAR_MEDIA_TYPE, headers=headers)
+
+# Declared before the team feed so "events" is not taken for a team id.
+@app.get("/api/calendar/events.ics")
+async def get_events_calendar(
+    request: Request,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+):
+    start, end = calendar_window(start, end)
+    query = {"is_public": True, "event_date": {"$gte": start, "$lt": end}}
+    return await calendar_response(
+        request, "Sports Club Events", "calendar:events", "", events_collection, query, "event_date", event_vevent
+    )
+
+@app.get("/api/calendar/{team_id}.ics")
+async def get_team_calendar(
+    request: Request,
+    team_id: str,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+):
+    team = await get_cached_entity("teams", teams_collection, team_id)
+    if not team:
+        raise HTTPException(status_code=404, detail="Team not found")
+    start, end = calendar_window(start, end)
+    query = team_matches_query(team_id, match_date={"$gte": start, "$lt": end})
+    return await calendar_response(
+        request, f"{team['name']} fixtures", f"calendar:{team_id}", str(team.get("version", 0)),
+        matches_collection, query, "match_date", match_vevent,
+    )
+
+# Images
+# POST /api/images takes a multipart upload, keeps the original and renders
+# IMAGE_RENDITIONS (name -> bounding box in pixels) as WebP in a process pool,
+# and returns the ImageSet to store on a team, player, event, news article or
+# sponsor. Image ids are derived from the original's bytes, so re-uploading
+# the same file is free and every URL under /api/images is immutable. Files
+# live under IMAGE_DIR, or in GridFS with IMAGE_STORE=gridfs.
+IMAGE_STORE = os.environ.get('IMAGE_STORE', 'local')
+IMAGE_DIR = os.environ.get('IMAGE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media'))
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', str(15 * 1024 * 1024)))
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', '50000000'))
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', '80'))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+IMAGE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+IMAGE_FILE_PATTERN = re.compile(r"^[a-z]+\.(webp|jpg|png|gif)$")
+
+def image_renditions_from_env() -> Dict[str, int]:
+    # Rendition names become file names, so they must be ones IMAGE_FILE_PATTERN serves.
+    renditions = json.loads(os.environ.get('IMAGE_RENDITIONS', '{"thumb": 160, "card": 480, "large": 1280}'))
+    for name, size in renditions.items():
+        if not re.fullmatch(r"[a-z]+", name) or name == "original" or not isinstance(size, int) or size <= 0:
+            raise ValueError(f"IMAGE_RENDITIONS needs lowercase letter names (not 'original') and positive pixel sizes, got {name!r}: {size!r}")
+    return renditions
+
+IMAGE_RENDITIONS = image_renditions_from_env()
+image_store = GridFSImageStore(lambda: mongo.database(shared=True)) if IMAGE_STORE == 'gridfs' else LocalImageStore(IMAGE_DIR)
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+def image_pool() -> ProcessPoolExecutor:
+    global _image_pool
+    if _image_pool is None:
+        # Not fork: forking while Motor's threads hold locks can deadlock workers.
+        _image_pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return _image_pool
+
+def shutdown_image_pool():
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(cancel_futures=True)
+        _image_pool = None
+
+def image_url(image_id: str, filename: str) -> str:
+    return f"/api/images/{image_id}/{filename}"
+
+@app.post("/api/images", response_model=ImageSet)
+async def upload_image(file: UploadFile = File(...)):
+    data = await file.read(IMAGE_MAX_BYTES + 1)
+    if len(data) > IMAGE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Image is too large")
+    image_id = hashlib.sha256(data).hexdigest()[:32]
+    existing = await images_collection.find_one({"id": image_id}, {"_id": 0})
+    if existing:
+        return document_response(existing)
+    try:
+        extension, width, height, renditions = await asyncio.get_running_loop().run_in_executor(
+            image_pool(), render_renditions, data, IMAGE_RENDITIONS, IMAGE_QUALITY, IMAGE_MAX_PIXELS
+        )
+    except InvalidImage:
+        raise HTTPException(status_code=400, detail="Not a supported image (JPEG, PNG, WebP or GIF)")
+    original = f"original.{extension}"
+    await asyncio.gather(
+        image_store.save(f"{image_id}/{original}", data, MEDIA_TYPES[extension]),
+        *(image_store.save(f"{image_id}/{name}.webp", body, MEDIA_TYPES["webp"]) for name, (body, _, _) in renditions.items()),
+    )
+    image_set = ImageSet(
+        id=image_id,
+        original=ImageRendition(url=image_url(image_id, original), width=width, height=height, size=len(data)),
+        renditions={
+            name: ImageRendition(url=image_url(image_id, f"{name}.webp"), width=w, height=h, size=len(body))
+            for name, (body, w, h) in renditions.items()
+        },
+    )
+    try:
+        await images_collection.insert_one(image_set.dict())
+    except DuplicateKeyError:
+        pass  # the same file uploaded concurrently; both wrote identical bytes
+    return image_set
+
+@app.get("/api/images/{image_id}/{filename}")
+async def get_image(request: Request, image_id: str, filename: str):
+    if not IMAGE_ID_PATTERN.match(image_id) or not IMAGE_FILE_PATTERN.match(filename):
+        raise HTTPException(status_code=404, detail="Image not found")
+    key = f"{image_id}/{filename}"
+    stat = await image_store.stat(key)
+    if stat is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    size, media_type = stat
+    etag = f'"{image_id}-{filename}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    start, end, status_code = 0, size - 1, 200
+    if request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            (start, end), status_code = byte_range, 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(image_store.read(key, start, end), status_code=status_code, media_type=media_type, headers=headers)
+
 @app.get("/api/")
 async def root():
     return {"message": "Sports Club API is running!", "version": "1.0.0"}
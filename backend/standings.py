@@ -0,0 +1,95 @@
+"""League table arithmetic shared by the incremental and full-rebuild paths.
+
+A completed match with both scores contributes one row update per team, keyed
+by (season, competition, team_id). Only raw counts are stored; points are
+derived when the table is read, so changing a sport's point system needs no
+rebuild.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+StandingKey = Tuple[Optional[str], Optional[str], str]
+
+STAT_FIELDS = ("played", "won", "drawn", "lost", "goals_for", "goals_against")
+
+DEFAULT_POINT_SYSTEMS: Dict[str, Dict[str, int]] = {
+    "football": {"win": 3, "draw": 1, "loss": 0},
+    "hockey": {"win": 2, "draw": 1, "loss": 0},
+    "basketball": {"win": 2, "draw": 1, "loss": 1},
+    "volleyball": {"win": 3, "draw": 1, "loss": 0},
+    "tennis": {"win": 1, "draw": 0, "loss": 0},
+}
+
+
+def match_contributions(match: Optional[Dict[str, Any]]) -> List[Tuple[StandingKey, Dict[str, Any], Dict[str, int]]]:
+    if not match or match.get("status") != "completed":
+        return []
+    home_score, away_score = match.get("home_score"), match.get("away_score")
+    if home_score is None or away_score is None:
+        return []
+    season, competition = match.get("season"), match.get("competition")
+    sport = str(getattr(match.get("sport"), "value", match.get("sport")))
+    contributions = []
+    for side, scored, conceded in (("home", home_score, away_score), ("away", away_score, home_score)):
+        counts = {
+            "played": 1,
+            "won": int(scored > conceded),
+            "drawn": int(scored == conceded),
+            "lost": int(scored < conceded),
+            "goals_for": scored,
+            "goals_against": conceded,
+        }
+        meta = {"team_name": match.get(f"{side}_team_name"), "sport": sport}
+        contributions.append(((season, competition, match[f"{side}_team_id"]), meta, counts))
+    return contributions
+
+
+def standings_delta(changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> Dict[StandingKey, Dict[str, Any]]:
+    """Row increments that replace each ``before`` match with its ``after`` version."""
+    delta: Dict[StandingKey, Dict[str, Any]] = {}
+    for before, after in changes:
+        for sign, match in ((-1, before), (1, after)):
+            for key, meta, counts in match_contributions(match):
+                entry = delta.setdefault(key, {"meta": None, "inc": dict.fromkeys(STAT_FIELDS, 0)})
+                if sign > 0:
+                    entry["meta"] = meta
+                for field, value in counts.items():
+                    entry["inc"][field] += sign * value
+    return {
+        key: entry for key, entry in delta.items()
+        if entry["meta"] is not None or any(entry["inc"].values())
+    }
+
+
+def compute_standings(matches: Iterable[Dict[str, Any]]) -> Dict[StandingKey, Dict[str, Any]]:
+    rows: Dict[StandingKey, Dict[str, Any]] = {}
+    for match in matches:
+        for key, meta, counts in match_contributions(match):
+            row = rows.setdefault(key, {
+                "season": key[0],
+                "competition": key[1],
+                "team_id": key[2],
+                **dict.fromkeys(STAT_FIELDS, 0),
+            })
+            row.update(meta)
+            for field, value in counts.items():
+                row[field] += value
+    return rows
+
+
+def rank_table(rows: Iterable[Dict[str, Any]], point_systems: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    table = []
+    for row in rows:
+        system = point_systems.get(row.get("sport"), DEFAULT_POINT_SYSTEMS["football"])
+        entry = {field: row.get(field, 0) for field in STAT_FIELDS}
+        entry.update(
+            team_id=row["team_id"],
+            team_name=row.get("team_name"),
+            sport=row.get("sport"),
+            goal_difference=entry["goals_for"] - entry["goals_against"],
+            points=entry["won"] * system["win"] + entry["drawn"] * system["draw"] + entry["lost"] * system["loss"],
+        )
+        table.append(entry)
+    table.sort(key=lambda e: (-e["points"], -e["goal_difference"], -e["goals_for"], e["team_name"] or ""))
+    for position, entry in enumerate(table, start=1):
+        entry["position"] = position
+    return table
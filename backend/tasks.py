@@ -0,0 +1,315 @@
+"""Background jobs run by a bounded pool of asyncio workers.
+
+Handlers are registered by name with ``@queue.task("name")`` and enqueued
+with a payload of plain, BSON-encodable keyword arguments, to run as soon as
+a worker is free or at a given time. A job that raises is retried with
+exponential backoff and kept as failed once it has used max_attempts. Jobs
+enqueued with a key replace the pending job holding that key, so
+rescheduling does not pile up duplicates. With a ``context`` variable, each
+job records its value when enqueued and runs with it set again (this is how
+jobs keep the club they were enqueued for); keys are scoped to that value.
+
+Without a collection, jobs live in this process and are lost on restart.
+With one, the queue is durable: jobs are documents, a worker claims one by
+setting a lease on it, and jobs whose lease ran out (their process died
+mid-job) go back to pending. Durable workers wait at most poll_interval
+before looking again, so jobs enqueued by other processes and jobs that
+become due are picked up without any extra signalling.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, FAILED = "pending", "running", "failed"
+FAILED_JOBS_KEPT = 100
+
+
+class JobQueue:
+    def __init__(
+        self,
+        collection=None,
+        workers: int = 4,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        poll_interval: float = 1.0,
+        lease: float = 300.0,
+        metrics=None,
+        context: Optional[ContextVar] = None,
+    ):
+        self.collection = collection
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.metrics = metrics
+        self.context = context
+        self.handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        # In-memory mode: (run_at, sequence, job) heap, plus the pending job id per key.
+        self._heap: List = []
+        self._sequence = itertools.count()
+        self._keys: Dict[Tuple[Any, str], str] = {}
+        self._replaced: set = set()
+        self._failed: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._reclaimer: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._running = 0
+        self.totals = {"enqueued": 0, "completed": 0, "retried": 0, "failed": 0}
+        self._timings: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"runs": 0, "wait": 0.0, "max_wait": 0.0, "run": 0.0, "max_run": 0.0}
+        )
+
+    @property
+    def durable(self) -> bool:
+        return self.collection is not None
+
+    def task(self, name: str):
+        def register(handler):
+            self.handlers[name] = handler
+            return handler
+        return register
+
+    async def enqueue(self, name: str, payload: Optional[Dict[str, Any]] = None, run_at: Optional[datetime] = None, key: Optional[str] = None) -> str:
+        if name not in self.handlers:
+            raise LookupError(f"No handler registered for job {name!r}")
+        now = datetime.now()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "name": name,
+            "payload": payload or {},
+            "run_at": run_at or now,
+            "attempts": 0,
+            "enqueued_at": now,
+        }
+        if key is not None:
+            job["key"] = key
+        if self.context is not None and self.context.get() is not None:
+            job["context"] = self.context.get()
+        self.totals["enqueued"] += 1
+        if self.durable:
+            job_id = await self._store(job)
+        else:
+            if key is not None:
+                scoped_key = (job.get("context"), key)
+                if scoped_key in self._keys:
+                    self._replaced.add(self._keys[scoped_key])
+                self._keys[scoped_key] = job["_id"]
+            heapq.heappush(self._heap, (job["run_at"], next(self._sequence), job))
+            job_id = job["_id"]
+        self._wakeup.set()
+        return job_id
+
+    async def _store(self, job: Dict[str, Any]) -> str:
+        if "key" not in job:
+            await self.collection.insert_one({**job, "status": PENDING})
+            return job["_id"]
+        fields = {name: job[name] for name in ("name", "payload", "run_at", "attempts", "enqueued_at")}
+        for _ in range(2):
+            try:
+                stored = await self.collection.find_one_and_update(
+                    {"key": job["key"], "context": job.get("context"), "status": PENDING},
+                    {"$set": fields, "$setOnInsert": {"_id": job["_id"]}},
+                    upsert=True,
+                    projection={"_id": 1},
+                    return_document=ReturnDocument.AFTER,
+                )
+                return stored["_id"]
+            except DuplicateKeyError:
+                # Another process inserted the same key first; update theirs.
+                continue
+        raise RuntimeError(f"Could not enqueue job with key {job['key']!r}")
+
+    async def start(self):
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._reclaimer = asyncio.create_task(self._reclaim_expired()) if self.durable else None
+
+    async def stop(self, timeout: float = 10.0):
+        """Let running jobs finish (up to ``timeout``) and stop the workers."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._reclaimer is not None:
+            # Holds no job, and may be sleeping for a good part of the lease.
+            self._reclaimer.cancel()
+            await asyncio.gather(self._reclaimer, return_exceptions=True)
+            self._reclaimer = None
+        if not self._tasks:
+            return
+        _, still_running = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while not self._stopping:
+            try:
+                job = await (self._claim() if self.durable else self._pop())
+                if job is None:
+                    continue
+                self._running += 1
+                try:
+                    await self._run(job)
+                finally:
+                    self._running -= 1
+            except Exception:
+                # E.g. AutoReconnect while claiming or settling a job: keep the
+                # worker alive. A job claimed but not settled is requeued once
+                # its lease runs out.
+                logger.exception("Job worker error, retrying in %.1fs", self.poll_interval)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _pop(self) -> Optional[Dict[str, Any]]:
+        while self._heap and self._heap[0][2]["_id"] in self._replaced:
+            self._replaced.discard(heapq.heappop(self._heap)[2]["_id"])
+        if self._heap and self._heap[0][0] <= datetime.now():
+            job = heapq.heappop(self._heap)[2]
+            scoped_key = (job.get("context"), job.get("key"))
+            if self._keys.get(scoped_key) == job["_id"]:
+                del self._keys[scoped_key]
+            return job
+        timeout = (self._heap[0][0] - datetime.now()).total_seconds() if self._heap else None
+        await self._wait(timeout)
+        return None
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.now()
+        job = await self.collection.find_one_and_update(
+            {"status": PENDING, "run_at": {"$lte": now}},
+            {"$set": {"status": RUNNING, "lease_until": now + timedelta(seconds=self.lease)}},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            await self._wait(self.poll_interval)
+        return job
+
+    async def _wait(self, timeout: Optional[float]):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _reclaim_expired(self):
+        while not self._stopping:
+            try:
+                result = await self.collection.update_many(
+                    {"status": RUNNING, "lease_until": {"$lte": datetime.now()}},
+                    {"$set": {"status": PENDING}, "$unset": {"lease_until": ""}},
+                )
+                if result.modified_count:
+                    logger.warning("Requeued %d jobs whose lease expired", result.modified_count)
+                    self._wakeup.set()
+            except Exception:
+                logger.exception("Could not requeue expired jobs")
+            await asyncio.sleep(max(self.lease / 4, self.poll_interval))
+
+    async def _run(self, job: Dict[str, Any]):
+        name = job["name"]
+        wait = max((datetime.now() - job["run_at"]).total_seconds(), 0.0)
+        started = time.perf_counter()
+        token = self.context.set(job.get("context")) if self.context is not None else None
+        try:
+            await self.handlers[name](**job["payload"])
+        except Exception as exc:
+            outcome = await self._retry_or_fail(job, exc)
+        else:
+            outcome = "completed"
+            if self.durable:
+                await self.collection.delete_one({"_id": job["_id"]})
+        finally:
+            if token is not None:
+                self.context.reset(token)
+        self._record(name, outcome, wait, time.perf_counter() - started)
+
+    async def _retry_or_fail(self, job: Dict[str, Any], exc: Exception) -> str:
+        attempts = job["attempts"] + 1
+        error = f"{type(exc).__name__}: {exc}"
+        if attempts >= self.max_attempts:
+            logger.error("Job %s %s failed after %d attempts: %s", job["name"], job["_id"], attempts, error)
+            if self.durable:
+                await self.collection.update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {"status": FAILED, "attempts": attempts, "error": error, "failed_at": datetime.now()},
+                     "$unset": {"lease_until": "", "key": ""}},
+                )
+            else:
+                self._failed = (self._failed + [{**job, "attempts": attempts, "error": error}])[-FAILED_JOBS_KEPT:]
+            return "failed"
+        delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+        logger.warning("Job %s %s failed (attempt %d), retrying in %.1fs: %s", job["name"], job["_id"], attempts, delay, error)
+        run_at = datetime.now() + timedelta(seconds=delay)
+        if self.durable:
+            await self.collection.update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": PENDING, "attempts": attempts, "error": error, "run_at": run_at},
+                 "$unset": {"lease_until": ""}},
+            )
+        else:
+            retry = {**job, "attempts": attempts, "run_at": run_at}
+            retry.pop("key", None)
+            heapq.heappush(self._heap, (run_at, next(self._sequence), retry))
+        return "retried"
+
+    def _record(self, name: str, outcome: str, wait: float, run: float):
+        self.totals[outcome] += 1
+        timing = self._timings[name]
+        timing["runs"] += 1
+        timing["wait"] += wait
+        timing["max_wait"] = max(timing["max_wait"], wait)
+        timing["run"] += run
+        timing["max_run"] = max(timing["max_run"], run)
+        if self.metrics is not None:
+            self.metrics.job_wait.observe((name,), wait)
+            self.metrics.job_duration.observe((name,), run)
+            self.metrics.job_outcomes.inc((name, outcome))
+
+    async def stats(self) -> Dict[str, Any]:
+        now = datetime.now()
+        if self.durable:
+            ready, scheduled, running, failed = await asyncio.gather(
+                self.collection.count_documents({"status": PENDING, "run_at": {"$lte": now}}),
+                self.collection.count_documents({"status": PENDING, "run_at": {"$gt": now}}),
+                self.collection.count_documents({"status": RUNNING}),
+                self.collection.count_documents({"status": FAILED}),
+            )
+        else:
+            live = [run_at for run_at, _, job in self._heap if job["_id"] not in self._replaced]
+            ready = sum(1 for run_at in live if run_at <= now)
+            scheduled, running, failed = len(live) - ready, self._running, len(self._failed)
+        return {
+            "durable": self.durable,
+            "workers": self.workers,
+            "ready": ready,
+            "scheduled": scheduled,
+            "running": running,
+            "failed": failed,
+            "totals": dict(self.totals),
+            "jobs": {
+                name: {
+                    "runs": int(timing["runs"]),
+                    "mean_wait_ms": round(timing["wait"] / timing["runs"] * 1000, 3),
+                    "max_wait_ms": round(timing["max_wait"] * 1000, 3),
+                    "mean_run_ms": round(timing["run"] / timing["runs"] * 1000, 3),
+                    "max_run_ms": round(timing["max_run"] * 1000, 3),
+                }
+                for name, timing in self._timings.items()
+            },
+        }
@@ -0,0 +1,156 @@
+"""Serving many clubs (tenants) from one deployment.
+
+TenantMiddleware resolves the club of each request, from a header or from
+the host name, and holds it in the ``current_tenant`` context variable for
+the rest of the request; tasks spawned while handling it inherit the value.
+MongoConnection reads the variable to pick the club's database on the one
+shared client, so every CollectionProxy routes to the right club without the
+handlers passing anything around. TenantLocal keeps one instance of some
+in-process state per club, for the state that cannot simply be namespaced by
+key in a shared cache.
+"""
+import json
+import re
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+from urllib.parse import parse_qs
+
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+# Lowercase letters, digits and inner hyphens: valid as a host label and in a
+# MongoDB database name.
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9](?:[a-z0-9-]{0,30}[a-z0-9])?$")
+TENANCY_MODES = ("off", "header", "host")
+
+T = TypeVar("T")
+
+
+def tenant_from_host(host: str, suffix: str = "") -> Optional[str]:
+    """Return the club of ``fc-example.clubs.example.org`` (first label, or what precedes ``suffix``)."""
+    host = host.split(":", 1)[0].lower().rstrip(".")
+    if suffix:
+        suffix = suffix.lower().lstrip(".")
+        if not host.endswith("." + suffix):
+            return None
+        return host[: -len(suffix) - 1] or None
+    label, dot, _ = host.partition(".")
+    return label if dot else None
+
+
+class TenantLocal(Generic[T]):
+    """Per-club instances of ``factory()``, created on first use by each club.
+
+    Attribute access is forwarded to the current club's instance, like
+    CollectionProxy does for collections.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instances: Dict[Optional[str], T] = {}
+
+    def current(self) -> T:
+        tenant = current_tenant.get()
+        instance = self._instances.get(tenant)
+        if instance is None:
+            instance = self._instances[tenant] = self._factory()
+        return instance
+
+    def __getattr__(self, attr):
+        return getattr(self.current(), attr)
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+
+class TenantMiddleware:
+    """Pure ASGI middleware that scopes HTTP and WebSocket requests to a club.
+
+    ``resolve`` extracts a club id from the scope; requests without one use
+    ``default`` or get 400, ids that are malformed or for which ``is_known``
+    is false get 404, and ``prepare`` runs before the request is handled
+    (e.g. a once-per-process index bootstrap). Paths for which ``exempt``
+    returns true, and CORS preflights, run without a club.
+    """
+
+    def __init__(
+        self,
+        app,
+        resolve: Callable[[Dict[str, Any]], Optional[str]],
+        is_known: Callable[[str], Awaitable[bool]],
+        prepare: Callable[[str], Awaitable[None]],
+        default: Optional[str] = None,
+        exempt: Callable[[Dict[str, Any]], bool] = lambda scope: False,
+        vary: Optional[str] = None,
+    ):
+        self.app = app
+        self.resolve = resolve
+        self.is_known = is_known
+        self.prepare = prepare
+        self.default = default
+        self.exempt = exempt
+        self.vary = vary.encode("latin-1") if vary else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or scope.get("method") == "OPTIONS" or self.exempt(scope):
+            await self.app(scope, receive, send)
+            return
+        tenant = self.resolve(scope) or self.default
+        if tenant is None:
+            await self._reject(scope, send, 400, "Club not specified")
+            return
+        if not TENANT_ID_PATTERN.match(tenant) or not await self.is_known(tenant):
+            await self._reject(scope, send, 404, "Club not found")
+            return
+        token = current_tenant.set(tenant)
+        try:
+            await self.prepare(tenant)
+            await self.app(scope, receive, self._send_with_vary(send) if self.vary else send)
+        finally:
+            current_tenant.reset(token)
+
+    def _send_with_vary(self, send):
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"vary", self.vary)]}
+            await send(message)
+        return send_with_vary
+
+    async def _reject(self, scope, send, status: int, detail: str):
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008, "reason": detail})
+            return
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def header_resolver(header: str, query_param: Optional[str] = None) -> Callable[[Dict[str, Any]], Optional[str]]:
+    """Read the club from ``header``, falling back to ``?query_param=`` for
+    clients that cannot set headers (EventSource, WebSocket)."""
+    name = header.lower().encode("latin-1")
+
+    def resolve(scope) -> Optional[str]:
+        for key, value in scope.get("headers", ()):
+            if key == name:
+                return value.decode("latin-1").strip().lower() or None
+        if query_param:
+            values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(query_param)
+            if values:
+                return values[0].strip().lower() or None
+        return None
+
+    return resolve
+
+
+def host_resolver(suffix: str = "") -> Callable[[Dict[str, Any]], Optional[str]]:
+    def resolve(scope) -> Optional[str]:
+        for key, value in scope.get("headers", ()):
+            if key == b"host":
+                return tenant_from_host(value.decode("latin-1"), suffix)
+        return None
+
+    return resolve
@@ -0,0 +1,333 @@
+"""Latency and throughput of every API route under concurrent load.
+
+Seeds a scratch database on the local mongod (MONGO_URL, DB_NAME; DB_NAME
+defaults to a fresh sports_club_bench_* name) through the API's own bulk
+endpoints, so counters, standings and indexes are built the way production
+builds them. Each route then gets --requests requests with --concurrency in
+flight, and per-route throughput and p50/p95/p99 latency are written to
+--output as JSON. The app runs in-process over httpx's ASGI transport unless
+--url points at a server that is already running against the same database.
+
+    python benchmarks/bench_api.py --teams 20 --players-per-team 25 --matches 2000
+    python benchmarks/bench_api.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_api.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+With --baseline the run exits 1 when a route's p95 grew, or its throughput
+fell, by more than --tolerance relative to the stored run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+SPORTS = ["football", "basketball", "volleyball", "tennis", "hockey"]
+SEASON, COMPETITION = "2025-2026", "League"
+NDJSON = "application/x-ndjson"
+
+
+def seed_data(args, rng):
+    now = datetime.now().replace(microsecond=0)
+    teams = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Team {i}",
+            "sport": SPORTS[i % len(SPORTS)],
+            "category": ["Senior", "Junior", "Youth"][i % 3],
+            "description": f"Description of team {i}. " * 5,
+            "coach": f"Coach {i}",
+            "home_venue": f"Stadium {i % 7}",
+        }
+        for i in range(args.teams)
+    ]
+    players = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Player {team['name']} {j}",
+            "team_id": team["id"],
+            "jersey_number": j + 1,
+            "position": ["Goalkeeper", "Defender", "Midfielder", "Forward"][j % 4],
+            "age": 18 + j % 17,
+            "bio": "Club player since the youth academy. " * 4,
+            "stats": {"games": rng.randint(1, 40), "goals": rng.randint(0, 25), "assists": rng.randint(0, 15)},
+            "is_active": rng.random() > 0.1,
+        }
+        for team in teams
+        for j in range(args.players_per_team)
+    ]
+    by_sport = {}
+    for team in teams:
+        by_sport.setdefault(team["sport"], []).append(team)
+    pairable = [group for group in by_sport.values() if len(group) > 1]
+    matches = []
+    for _ in range(args.matches if pairable else 0):
+        home, away = rng.sample(rng.choice(pairable), 2)
+        match_date = now + timedelta(days=rng.randint(-180, 180), hours=rng.randint(0, 23))
+        played = match_date < now
+        matches.append({
+            "id": str(uuid.uuid4()),
+            "home_team_id": home["id"],
+            "away_team_id": away["id"],
+            "home_team_name": home["name"],
+            "away_team_name": away["name"],
+            "match_date": match_date.isoformat(),
+            "venue": home["home_venue"],
+            "sport": home["sport"],
+            "home_score": rng.randint(0, 5) if played else None,
+            "away_score": rng.randint(0, 5) if played else None,
+            "status": "completed" if played else "scheduled",
+            "match_report": "Report of the match. " * 20 if played else None,
+            "season": SEASON,
+            "competition": COMPETITION,
+        })
+    news = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Club news {i}",
+            "content": "Full article text about the club. " * 60,
+            "summary": "Short summary of the article.",
+            "author": f"Author {i % 5}",
+            "category": ["Club", "Match", "Youth"][i % 3],
+            "tags": ["club", "news"],
+            "published": rng.random() > 0.2,
+        }
+        for i in range(args.news)
+    ]
+    events = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Club event {i}",
+            "description": "Event open to members and supporters. " * 5,
+            "event_date": (now + timedelta(days=rng.randint(-60, 120))).isoformat(),
+            "location": "Clubhouse",
+            "event_type": ["match", "training", "tournament", "meeting", "social"][i % 5],
+        }
+        for i in range(args.events)
+    ]
+    sponsors = [
+        {"name": f"Sponsor {i}", "sponsorship_level": ["Gold", "Silver", "Bronze"][i % 3]}
+        for i in range(args.sponsors)
+    ]
+    return {"teams": teams, "players": players, "matches": matches, "news": news, "events": events, "sponsors": sponsors}
+
+
+async def seed(client, data):
+    for kind in ("teams", "players", "matches", "news", "events"):
+        if not data[kind]:
+            continue
+        body = b"".join(json.dumps(row).encode("utf-8") + b"\n" for row in data[kind])
+        response = await client.post(f"/api/{kind}/bulk", content=body, headers={"Content-Type": NDJSON}, timeout=None)
+        response.raise_for_status()
+        result = response.json()
+        if result.get("errors"):
+            raise SystemExit(f"seeding {kind} failed: {result['errors'][:3]}")
+    for sponsor in data["sponsors"]:
+        (await client.post("/api/sponsors", json=sponsor)).raise_for_status()
+
+
+def build_routes(data, read_only):
+    teams, players, matches = data["teams"], data["players"], data["matches"]
+
+    def pick(rows, i):
+        return rows[i % len(rows)]
+
+    def get(url):
+        return lambda i: ("GET", url(i) if callable(url) else url, {})
+
+    routes = {
+        "GET /api/": get("/api/"),
+        "GET /api/teams": get("/api/teams"),
+        "GET /api/teams/{id}": get(lambda i: f"/api/teams/{pick(teams, i)['id']}"),
+        "GET /api/teams/{id}/overview": get(lambda i: f"/api/teams/{pick(teams, i)['id']}/overview"),
+        "GET /api/players": get("/api/players"),
+        "GET /api/players?view=card": get("/api/players?view=card"),
+        "GET /api/players?team_id": get(lambda i: f"/api/players?team_id={pick(teams, i)['id']}"),
+        "GET /api/players/{id}": get(lambda i: f"/api/players/{pick(players, i)['id']}"),
+        "GET /api/matches": get("/api/matches"),
+        "GET /api/matches (ndjson)": lambda i: ("GET", "/api/matches?limit=500", {"headers": {"Accept": NDJSON}}),
+        "GET /api/matches?team_id": get(lambda i: f"/api/matches?team_id={pick(teams, i)['id']}"),
+        "GET /api/matches/{id}": get(lambda i: f"/api/matches/{pick(matches, i)['id']}"),
+        "GET /api/events": get("/api/events"),
+        "GET /api/news": get("/api/news"),
+        "GET /api/news?view=summary": get("/api/news?view=summary"),
+        "GET /api/sponsors": get("/api/sponsors"),
+        "GET /api/stats": get("/api/stats"),
+        "GET /api/home": get("/api/home"),
+        "GET /api/cache/stats": get("/api/cache/stats"),
+        "GET /api/standings": get(f"/api/standings?season={SEASON}&competition={COMPETITION}"),
+        "GET /api/leaderboards": get("/api/leaderboards?stat=goals"),
+        "GET /api/leaderboards/stats": get("/api/leaderboards/stats"),
+        "GET /api/search": get(lambda i: f"/api/search?q={['club', 'team', 'player', 'event'][i % 4]}"),
+        "GET /api/calendar/events.ics": get("/api/calendar/events.ics"),
+        "GET /api/calendar/{team_id}.ics": get(lambda i: f"/api/calendar/{pick(teams, i)['id']}.ics"),
+    }
+    if not read_only:
+        routes.update({
+            "POST /api/news": lambda i: ("POST", "/api/news", {"json": {
+                "title": f"Bench news {i}", "content": "Body. " * 50, "summary": "Summary",
+                "author": "Bench", "category": "Club", "published": True,
+            }}),
+            "POST /api/events": lambda i: ("POST", "/api/events", {"json": {
+                "title": f"Bench event {i}", "description": "Description",
+                "event_date": (datetime.now() + timedelta(days=i % 90)).isoformat(),
+                "location": "Clubhouse", "event_type": "social",
+            }}),
+            "PUT /api/players/{id}": lambda i: ("PUT", f"/api/players/{pick(players, i)['id']}", {
+                "json": {**pick(players, i), "jersey_number": i % 99},
+            }),
+            "PUT /api/matches/{id}": lambda i: ("PUT", f"/api/matches/{pick(matches, i)['id']}", {
+                "json": {**pick(matches, i), "home_score": i % 6, "away_score": (i // 6) % 6, "status": "completed"},
+            }),
+        })
+    if not matches:
+        routes = {name: route for name, route in routes.items() if "/api/matches/{id}" not in name}
+    return routes
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_route(client, make_request, requests, concurrency):
+    latencies, errors = [], 0
+    indices = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in indices:
+            method, url, kwargs = make_request(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+    }
+
+
+async def run_benchmark(client, args, data):
+    print(f"seeding {', '.join(f'{len(rows)} {kind}' for kind, rows in data.items())}")
+    await seed(client, data)
+    routes = build_routes(data, args.read_only)
+    if args.routes:
+        routes = {name: route for name, route in routes.items() if any(part in name for part in args.routes)}
+    results = {}
+    for name, make_request in routes.items():
+        if args.warmup:
+            await run_route(client, make_request, args.warmup, min(args.concurrency, args.warmup))
+        results[name] = await run_route(client, make_request, args.requests, args.concurrency)
+        row = results[name]
+        print(f"{name:<36} {row['throughput_rps']:>9.1f} req/s  p50 {row['p50_ms']:>8.2f}  "
+              f"p95 {row['p95_ms']:>8.2f}  p99 {row['p99_ms']:>8.2f} ms  errors {row['errors']}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s")
+    return regressions
+
+
+async def main(args):
+    data = seed_data(args, random.Random(args.seed))
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            routes = await run_benchmark(client, args, data)
+    else:
+        os.environ.setdefault("DB_NAME", f"sports_club_bench_{uuid.uuid4().hex[:8]}")
+        sys.path.insert(0, BACKEND)
+        import server
+
+        transport = httpx.ASGITransport(app=server.app)
+        try:
+            async with server.app.router.lifespan_context(server.app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                    routes = await run_benchmark(client, args, data)
+        finally:
+            if not args.keep_db:
+                await server.mongo.open().drop_database(server.DB_NAME)
+                server.mongo.close()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "target": args.url or "in-process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "volumes": {kind: len(rows) for kind, rows in data.items()},
+        },
+        "routes": routes,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"results written to {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"baseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--players-per-team", type=int, default=25)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--news", type=int, default=500)
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--sponsors", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per route")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--routes", nargs="*", help="only run routes whose name contains one of these")
+    parser.add_argument("--read-only", action="store_true", help="skip the write routes")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--keep-db", action="store_true", help="keep the seeded database afterwards")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_api_results.json")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,198 @@
+"""Hot-path latency before and after closing past seasons.
+
+Seeds a scratch database on the local mongod (MONGO_URL, DB_NAME; DB_NAME
+defaults to a fresh sports_club_archive_* name) with --seasons seasons of
+matches and news spread over the same years, all through the bulk endpoints.
+The match and news routes are measured, every season but the current one is
+closed with server.close_season(), and the same routes are measured again.
+Collection and index sizes of the hot collections are reported for both
+states, and both runs are written to --output as JSON.
+
+    python benchmarks/bench_archive.py --seasons 5 --matches-per-season 20000 --news 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+from bench_api import BACKEND, NDJSON, SPORTS, run_route, seed
+
+COMPETITION = "League"
+
+
+def season_name(year):
+    return f"{year}-{year + 1}"
+
+
+def seed_data(args, rng):
+    now = datetime.now().replace(microsecond=0)
+    teams = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Team {i}",
+            "sport": SPORTS[i % len(SPORTS)],
+            "category": "Senior",
+            "description": f"Description of team {i}.",
+            "home_venue": f"Stadium {i % 7}",
+        }
+        for i in range(args.teams)
+    ]
+    by_sport = {}
+    for team in teams:
+        by_sport.setdefault(team["sport"], []).append(team)
+    pairable = [group for group in by_sport.values() if len(group) > 1]
+    seasons = [season_name(now.year - args.seasons + 1 + i) for i in range(args.seasons)]
+    matches = []
+    for index, season in enumerate(seasons):
+        # The last season ends half a year from now; each earlier one a year before.
+        season_end = now + timedelta(days=180 - 365 * (args.seasons - 1 - index))
+        for _ in range(args.matches_per_season if pairable else 0):
+            home, away = rng.sample(rng.choice(pairable), 2)
+            match_date = season_end - timedelta(days=rng.uniform(0, 360))
+            played = match_date < now
+            matches.append({
+                "id": str(uuid.uuid4()),
+                "home_team_id": home["id"],
+                "away_team_id": away["id"],
+                "home_team_name": home["name"],
+                "away_team_name": away["name"],
+                "match_date": match_date.isoformat(),
+                "venue": home["home_venue"],
+                "sport": home["sport"],
+                "home_score": rng.randint(0, 5) if played else None,
+                "away_score": rng.randint(0, 5) if played else None,
+                "status": "completed" if played else "scheduled",
+                "match_report": "Report of the match. " * 20 if played else None,
+                "season": season,
+                "competition": COMPETITION,
+            })
+    news = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Club news {i}",
+            "content": "Full article text about the club. " * 60,
+            "summary": "Short summary of the article.",
+            "author": f"Author {i % 5}",
+            "category": "Club",
+            "published": rng.random() > 0.2,
+            "created_at": (now - timedelta(days=rng.uniform(0, 365 * args.seasons - 180))).isoformat(),
+        }
+        for i in range(args.news)
+    ]
+    empty = {"events": [], "players": [], "sponsors": []}
+    return seasons, {"teams": teams, "matches": matches, "news": news, **empty}
+
+
+def build_routes(teams, current, past):
+    def get(url):
+        return lambda i: ("GET", url(i) if callable(url) else url, {})
+
+    team = lambda i: teams[i % len(teams)]["id"]  # noqa: E731
+    return {
+        "GET /api/matches": get("/api/matches"),
+        "GET /api/matches (ndjson)": lambda i: ("GET", "/api/matches?limit=500", {"headers": {"Accept": NDJSON}}),
+        "GET /api/matches?team_id": get(lambda i: f"/api/matches?team_id={team(i)}"),
+        "GET /api/matches?season=current": get(f"/api/matches?season={current}"),
+        "GET /api/matches?season=current&team_id": get(lambda i: f"/api/matches?season={current}&team_id={team(i)}"),
+        "GET /api/matches?season=past": get(lambda i: f"/api/matches?season={past[i % len(past)]}"),
+        "GET /api/news": get("/api/news"),
+        "GET /api/overview": get(lambda i: f"/api/teams/{team(i)}/overview"),
+    }
+
+
+async def collection_sizes(server):
+    database = server.mongo.database()
+    sizes = {}
+    for name in ("matches", "news", "matches_archive", "news_archive"):
+        stats = await database.command("collStats", name)
+        sizes[name] = {
+            "count": stats.get("count", 0),
+            "size_mb": round(stats.get("size", 0) / 2**20, 2),
+            "index_mb": round(stats.get("totalIndexSize", 0) / 2**20, 2),
+        }
+        print(f"  {name:<16} {sizes[name]['count']:>8} docs  {sizes[name]['size_mb']:>8.2f} MB  "
+              f"indexes {sizes[name]['index_mb']:>7.2f} MB")
+    return sizes
+
+
+async def measure(client, routes, args):
+    results = {}
+    for name, make_request in routes.items():
+        if args.warmup:
+            await run_route(client, make_request, args.warmup, min(args.concurrency, args.warmup))
+        results[name] = await run_route(client, make_request, args.requests, args.concurrency)
+    return results
+
+
+async def main(args):
+    seasons, data = seed_data(args, random.Random(args.seed))
+    os.environ.setdefault("DB_NAME", f"sports_club_archive_{uuid.uuid4().hex[:8]}")
+    sys.path.insert(0, BACKEND)
+    import server
+
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with server.app.router.lifespan_context(server.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                print(f"seeding {len(seasons)} seasons, {len(data['matches'])} matches, {len(data['news'])} news")
+                await seed(client, data)
+                routes = build_routes(data["teams"], seasons[-1], seasons[:-1])
+                print("before archiving")
+                sizes_before = await collection_sizes(server)
+                before = await measure(client, routes, args)
+                for season in seasons[:-1]:
+                    result = await server.close_season(season)
+                    if not result["closed"]:
+                        raise SystemExit(f"{season} has {result['unfinished']} unfinished matches")
+                    print(f"closed {season}: {result['matches']} matches, {result['news']} news archived")
+                print("after archiving")
+                sizes_after = await collection_sizes(server)
+                after = await measure(client, routes, args)
+    finally:
+        if not args.keep_db:
+            await server.mongo.open().drop_database(server.DB_NAME)
+            server.mongo.close()
+
+    print(f"{'route':<42} {'p50 before':>10} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10}  ms")
+    for name in routes:
+        print(f"{name:<42} {before[name]['p50_ms']:>10.2f} {after[name]['p50_ms']:>10.2f} "
+              f"{before[name]['p95_ms']:>11.2f} {after[name]['p95_ms']:>10.2f}")
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seasons": seasons,
+            "volumes": {kind: len(rows) for kind, rows in data.items() if rows},
+        },
+        "before": {"sizes": sizes_before, "routes": before},
+        "after": {"sizes": sizes_after, "routes": after},
+    }
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seasons", type=int, default=5)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--matches-per-season", type=int, default=20000)
+    parser.add_argument("--news", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per route")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--keep-db", action="store_true", help="keep the seeded database afterwards")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_archive_results.json")
+    sys.exit(asyncio.run(main(parser.parse_args())))
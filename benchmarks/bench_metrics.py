@@ -0,0 +1,118 @@
+"""Hot-path cost of the metrics subsystem.
+
+Times requests through a bare FastAPI app with and without MetricsMiddleware
+by calling the ASGI app directly (no sockets, so the difference is the
+middleware itself), the per-command cost of the pymongo CommandMetrics
+listener, and how long /api/metrics takes to render a realistic number of
+series. No database is needed.
+
+    python benchmarks/bench_metrics.py --requests 20000 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from metrics import CommandMetrics, MetricsMiddleware, MetricsRegistry  # noqa: E402
+
+
+def build_app(registry=None):
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/api/teams/{team_id}")
+    async def get_team(team_id: str):
+        return ORJSONResponse({"id": team_id, "name": "Team"})
+
+    if registry is not None:
+        app.add_middleware(MetricsMiddleware, registry=registry)
+    return app
+
+
+async def drive(app, requests):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/teams/abc", "raw_path": b"/api/teams/abc", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def bench_listener(commands):
+    listener = CommandMetrics(MetricsRegistry(), slow_ms=100)
+    collections = ["teams", "players", "matches", "news", "events"]
+    started_events = [
+        SimpleNamespace(
+            command_name="find", connection_id=("localhost", 27017), request_id=i,
+            command={"find": collections[i % 5], "filter": {"id": "x"}},
+        )
+        for i in range(commands)
+    ]
+    succeeded_events = [
+        SimpleNamespace(
+            command_name="find", connection_id=("localhost", 27017), request_id=i,
+            duration_micros=800, reply={"cursor": {"firstBatch": [{}], "id": 0}},
+        )
+        for i in range(commands)
+    ]
+    started = time.perf_counter()
+    for start_event, success_event in zip(started_events, succeeded_events):
+        listener.started(start_event)
+        listener.succeeded(success_event)
+    return (time.perf_counter() - started) / commands * 1e6
+
+
+def bench_render(routes, repeats=20):
+    registry = MetricsRegistry()
+    for i in range(routes):
+        for status in ("200", "304", "404"):
+            registry.requests.observe(("GET", f"/api/route{i}/{{id}}", status), 0.003)
+        registry.db_commands.observe((f"collection{i % 10}", "find"), 0.001)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        body = registry.render()
+    return (time.perf_counter() - started) / repeats * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure metrics overhead")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--commands", type=int, default=100000)
+    parser.add_argument("--routes", type=int, default=60)
+    args = parser.parse_args()
+
+    async def compare():
+        # Interleaved rounds, best of each, to keep scheduler noise out of the difference.
+        apps = (build_app(), build_app(MetricsRegistry()))
+        rounds = [[await drive(app, args.requests) for app in apps] for _ in range(args.rounds)]
+        return min(r[0] for r in rounds), min(r[1] for r in rounds)
+
+    plain, instrumented = asyncio.run(compare())
+    print(f"request without metrics   {plain:8.2f} us")
+    print(f"request with metrics      {instrumented:8.2f} us  (+{instrumented - plain:.2f} us, {instrumented / plain - 1:+.1%})")
+    print(f"mongo command listener    {bench_listener(args.commands):8.2f} us per command")
+    render_ms, size = bench_render(args.routes)
+    print(f"render {args.routes} routes         {render_ms:8.2f} ms  ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Per-document cost of the read path before and after the fast encoder.
+
+"before" rebuilds each model from the raw document and lets FastAPI validate
+and serialize it against the route's response_model, as the read handlers
+used to. "after" encodes the projected documents straight to JSON with
+orjson, as the handlers do now. No database is needed; the documents are
+generated to look like what Motor returns.
+
+    python benchmarks/bench_serialization.py --rows 10000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import server  # noqa: E402
+
+
+def player_docs(rows):
+    now = datetime.now().replace(microsecond=0)
+    return [
+        {
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "name": f"Player {i}",
+            "team_id": str(uuid.uuid4()),
+            "jersey_number": i % 99,
+            "position": "Forward",
+            "age": 20 + i % 15,
+            "height": "1.80m",
+            "weight": "75kg",
+            "bio": "Academy graduate and first-team regular. " * 4,
+            "image": f"https://cdn.example.com/players/{i}.jpg",
+            "stats": {"goals": i % 30, "assists": i % 17, "games": 30},
+            "achievements": ["Player of the Month"],
+            "joined_date": None,
+            "is_active": True,
+            "created_at": now,
+        }
+        for i in range(rows)
+    ]
+
+
+def match_docs(rows):
+    now = datetime.now().replace(microsecond=0)
+    return [
+        {
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "home_team_id": str(uuid.uuid4()),
+            "away_team_id": str(uuid.uuid4()),
+            "home_team_name": "Champions FC",
+            "away_team_name": "Rivals United",
+            "match_date": now - timedelta(days=i),
+            "venue": "Main Stadium",
+            "sport": "football",
+            "home_score": i % 5,
+            "away_score": i % 3,
+            "status": "completed",
+            "match_report": None,
+            "season": "2024-2025",
+            "competition": "League",
+            "created_at": now,
+        }
+        for i in range(rows)
+    ]
+
+
+def response_field(path):
+    for route in server.app.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+async def before(model, field, docs):
+    content = await serialize_response(field=field, response_content=[model(**doc) for doc in docs], is_coroutine=True)
+    return JSONResponse(content=content).body
+
+
+async def after(docs):
+    # The handlers read with a projection, so _id never reaches the encoder.
+    return server.document_response(docs).body
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        asyncio.run(fn())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, model, path, docs in (
+        ("players", server.Player, "/api/players", player_docs(args.rows)),
+        ("matches", server.Match, "/api/matches", match_docs(args.rows)),
+    ):
+        field = response_field(path)
+        projected = [{k: v for k, v in doc.items() if k != "_id"} for doc in docs]
+        old = timed(lambda: before(model, field, docs), args.repeat)
+        new = timed(lambda: after(projected), args.repeat)
+        print(
+            f"{name:8} rows={args.rows}  "
+            f"before={old * 1e6 / args.rows:7.2f} us/doc  "
+            f"after={new * 1e6 / args.rows:7.2f} us/doc  "
+            f"speedup={old / new:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Per-club memory and connection overhead of a multi-club deployment.
+
+Registers --clubs clubs on the local mongod (MONGO_URL; DB_NAME defaults to
+a fresh sports_club_tenants_* name), seeds each club's database directly
+with a small roster and fixture list, then starts the app in-process with
+TENANCY=header. One club is warmed up so that code paths and imports are not
+counted. Then every other club gets its first requests, which include its
+index bootstrap, and the same request mix again. The report covers:
+
+- the Python heap growth per club (tracemalloc), grouped by source file;
+- the process RSS growth per club;
+- the server's open connections before and after, which should not grow
+  with the number of clubs;
+- first-request and warm latency per club.
+
+The process's own baseline RSS and pool size are what one deployment per
+club would pay for each club instead.
+
+    python benchmarks/bench_tenants.py --clubs 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+from pymongo import MongoClient
+
+from bench_api import BACKEND, SPORTS, percentile
+
+CLUB_HEADER = "X-Club-Id"
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def seed_club(server, database, rng, args):
+    now = datetime.now()
+    teams = [
+        server.Team(name=f"Team {i}", sport=SPORTS[i % 2], category="Senior", description="Club team.")
+        for i in range(args.teams)
+    ]
+    players = [
+        server.Player(
+            name=f"Player {i}.{j}", team_id=team.id, position="Forward",
+            stats={"games": rng.randint(1, 30), "goals": rng.randint(0, 20)},
+        )
+        for i, team in enumerate(teams)
+        for j in range(args.players_per_team)
+    ]
+    matches = []
+    for _ in range(args.matches):
+        home, away = rng.sample(teams, 2)
+        match_date = now + timedelta(days=rng.randint(-90, 90))
+        matches.append(server.Match(
+            home_team_id=home.id, away_team_id=away.id, home_team_name=home.name, away_team_name=away.name,
+            match_date=match_date, venue="Stadium", sport=home.sport, season="2025-2026", competition="League",
+            status="completed" if match_date < now else "scheduled",
+        ))
+    database.teams.insert_many([server.stamp_new(team) for team in teams])
+    database.players.insert_many([server.stamp_new(player) for player in players])
+    if matches:
+        database.matches.insert_many([server.stamp_new(match) for match in matches])
+    return [team.id for team in teams]
+
+
+def request_mix(team_ids):
+    team_id = team_ids[0]
+    return [
+        "/api/teams",
+        f"/api/teams/{team_id}",
+        f"/api/teams/{team_id}/overview",
+        "/api/players?view=card",
+        "/api/matches",
+        "/api/stats",
+        "/api/home",
+        "/api/leaderboards?stat=goals",
+        f"/api/calendar/{team_id}.ics",
+    ]
+
+
+async def visit(client, club, paths):
+    started = time.perf_counter()
+    for path in paths:
+        response = await client.get(path, headers={CLUB_HEADER: club})
+        response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def connections(server):
+    status = await server.mongo.database(shared=True).command("serverStatus")
+    return status["connections"]["current"]
+
+
+def grouped(diff, top):
+    by_file = {}
+    for stat in diff:
+        filename = stat.traceback[0].filename
+        for marker in ("site-packages/", "backend/"):
+            if marker in filename:
+                filename = filename.split(marker, 1)[1]
+        by_file[filename] = by_file.get(filename, 0) + stat.size_diff
+    return sorted(by_file.items(), key=lambda item: -item[1])[:top]
+
+
+async def main(args):
+    os.environ["TENANCY"] = "header"
+    os.environ.setdefault("DB_NAME", f"sports_club_tenants_{uuid.uuid4().hex[:8]}")
+    sys.path.insert(0, BACKEND)
+    import server
+
+    rng = random.Random(args.seed)
+    clubs = [f"club-{i:04d}" for i in range(args.clubs)]
+    sync_client = MongoClient(server.MONGO_URL)
+    print(f"seeding {len(clubs)} clubs")
+    team_ids = {}
+    for club in clubs:
+        sync_client[server.DB_NAME].clubs.insert_one({"_id": club, "name": club, "created_at": datetime.now()})
+        team_ids[club] = seed_club(server, sync_client[server.mongo.database_name(club)], rng, args)
+
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with server.app.router.lifespan_context(server.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                await visit(client, clubs[0], request_mix(team_ids[clubs[0]]))
+                baseline_rss = rss_bytes()
+                connections_before = await connections(server)
+
+                tracemalloc.start(args.frames)
+                before = tracemalloc.take_snapshot()
+                rss_before = rss_bytes()
+                cold = [await visit(client, club, request_mix(team_ids[club])) for club in clubs[1:]]
+                after = tracemalloc.take_snapshot()
+                rss_after = rss_bytes()
+                tracemalloc.stop()
+
+                warm = [await visit(client, club, request_mix(team_ids[club])) for club in clubs[1:]]
+                connections_after = await connections(server)
+    finally:
+        if not args.keep_db:
+            for club in clubs:
+                sync_client.drop_database(server.mongo.database_name(club))
+            sync_client.drop_database(server.DB_NAME)
+        sync_client.close()
+        server.mongo.close()
+
+    measured = len(clubs) - 1
+    diff = after.compare_to(before, "filename")
+    heap_per_club = sum(stat.size_diff for stat in diff) / measured
+    rss_per_club = (rss_after - rss_before) / measured
+    cold_sorted, warm_sorted = sorted(cold), sorted(warm)
+    print(f"clubs measured               {measured}")
+    print(f"python heap per club         {heap_per_club / 1024:10.1f} KiB")
+    print(f"rss per club                 {rss_per_club / 1024:10.1f} KiB")
+    print(f"process rss (one deployment) {baseline_rss / 2**20:10.1f} MiB, pool up to {server.mongo.options.get('maxPoolSize')} connections")
+    print(f"server connections           {connections_before} before, {connections_after} after")
+    print(f"first visit per club         p50 {percentile(cold_sorted, 0.5):8.1f} ms  p95 {percentile(cold_sorted, 0.95):8.1f} ms  (traced, includes index bootstrap)")
+    print(f"warm visit per club          p50 {percentile(warm_sorted, 0.5):8.1f} ms  p95 {percentile(warm_sorted, 0.95):8.1f} ms")
+    print("heap growth by file:")
+    top = grouped(diff, args.top)
+    for filename, size in top:
+        print(f"  {size / measured / 1024:10.2f} KiB/club  {filename}")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "clubs": len(clubs),
+            "per_club": {"teams": args.teams, "players_per_team": args.players_per_team, "matches": args.matches},
+        },
+        "heap_bytes_per_club": round(heap_per_club),
+        "rss_bytes_per_club": round(rss_per_club),
+        "process_rss_bytes": baseline_rss,
+        "server_connections": {"before": connections_before, "after": connections_after},
+        "first_visit_ms": {"p50": percentile(cold_sorted, 0.5), "p95": percentile(cold_sorted, 0.95)},
+        "warm_visit_ms": {"p50": percentile(warm_sorted, 0.5), "p95": percentile(warm_sorted, 0.95)},
+        "heap_bytes_per_club_by_file": {filename: round(size / measured) for filename, size in top},
+    }
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clubs", type=int, default=200)
+    parser.add_argument("--teams", type=int, default=6)
+    parser.add_argument("--players-per-team", type=int, default=15)
+    parser.add_argument("--matches", type=int, default=60)
+    parser.add_argument("--frames", type=int, default=1, help="traceback depth recorded by tracemalloc")
+    parser.add_argument("--top", type=int, default=15, help="source files listed in the heap breakdown")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--keep-db", action="store_true", help="keep the club databases afterwards")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_tenants_results.json")
+    if parser.parse_known_args()[0].clubs < 2:
+        parser.error("--clubs must be at least 2")
+    sys.exit(asyncio.run(main(parser.parse_args())))
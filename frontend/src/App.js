@@ -8,6 +8,18 @@ import './App.css';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL;
 
+// Image props for an ImageSet: the card rendition as src, every rendition in
+// srcSet so the browser picks the smallest one that fills the slot.
+const imageProps = (imageSet, fallback) => {
+  if (!imageSet) return { src: fallback };
+  const renditions = Object.values(imageSet.renditions || {});
+  return {
+    src: `${API_URL}${(imageSet.renditions?.card || imageSet.original).url}`,
+    srcSet: renditions.map((rendition) => `${API_URL}${rendition.url} ${rendition.width}w`).join(', '),
+    sizes: '(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw',
+  };
+};
+
 function App() {
   const [currentPage, setCurrentPage] = useState('home');
   const [isMenuOpen, setIsMenuOpen] = useState(false);
@@ -25,19 +37,16 @@ function App() {
   const fetchInitialData = async () => {
     try {
       setLoading(true);
-      const [teamsRes, matchesRes, newsRes, eventsRes, statsRes] = await Promise.all([
-        fetch(`${API_URL}/api/teams`),
-        fetch(`${API_URL}/api/matches?limit=5`),
-        fetch(`${API_URL}/api/news?limit=3`),
-        fetch(`${API_URL}/api/events?limit=5`),
-        fetch(`${API_URL}/api/stats`)
-      ]);
+      const homeRes = await fetch(`${API_URL}/api/home`);
 
-      if (teamsRes.ok) setTeams(await teamsRes.json());
-      if (matchesRes.ok) setMatches(await matchesRes.json());
-      if (newsRes.ok) setNews(await newsRes.json());
-      if (eventsRes.ok) setEvents(await eventsRes.json());
-      if (statsRes.ok) setStats(await statsRes.json());
+      if (homeRes.ok) {
+        const home = await homeRes.json();
+        setTeams(home.teams);
+        setMatches(home.matches);
+        setNews(home.news);
+        setEvents(home.events);
+        setStats(home.stats);
+      }
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -278,8 +287,8 @@ function App() {
         {teams.length > 0 ? teams.map((team) => (
           <Card key={team.id} className="hover:shadow-lg transition-shadow overflow-hidden">
             <div className="h-48 bg-gradient-to-br from-blue-500 to-blue-700 relative">
-              {team.image && (
-                <img src={team.image} alt={team.name} className="w-full h-full object-cover" />
+              {(team.image_set || team.image) && (
+                <img {...imageProps(team.image_set, team.image)} alt={team.name} loading="lazy" className="w-full h-full object-cover" />
               )}
               <div className="absolute inset-0 bg-blue-900/20"></div>
               <div className="absolute bottom-4 left-4 text-white">
@@ -0,0 +1,35 @@
+import asyncio
+
+from cache import EntityCache, MemoryCache
+
+
+def test_invalidation_during_a_load_keeps_the_old_document_out():
+    async def scenario():
+        cache = EntityCache(MemoryCache(), {"teams": 300})
+        stored = {"id": "t1", "version": 1}
+        loading, written = asyncio.Event(), asyncio.Event()
+
+        async def slow_load():
+            snapshot = dict(stored)
+            loading.set()
+            await written.wait()
+            return snapshot
+
+        async def write():
+            await loading.wait()
+            stored["version"] = 2
+            await cache.invalidate("teams", "t1")
+            written.set()
+
+        async def load():
+            return dict(stored)
+
+        stale, _ = await asyncio.gather(cache.get_or_load("teams", "t1", slow_load), write())
+        fresh = await cache.get_or_load("teams", "t1", load)
+        cached = await cache.get_or_load("teams", "t1", load)
+        return stale, fresh, cached, cache.stats()["kinds"]["teams"]
+
+    stale, fresh, cached, counts = asyncio.run(scenario())
+    assert stale["version"] == 1
+    assert fresh["version"] == 2 and cached["version"] == 2
+    assert counts["misses"] == 2 and counts["hits"] == 1
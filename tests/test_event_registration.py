@@ -0,0 +1,93 @@
+"""Concurrent event registration against a local mongod.
+
+Fires many simultaneous sign-ups and cancellations through the registration
+handlers and checks that the event is never overbooked, that the waitlist
+is promoted in arrival order and that registering twice is a no-op. Set
+MONGO_URL to point at the mongod to use.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import server
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+CAPACITY = 50
+MEMBERS = 1000
+
+
+@pytest.fixture(scope="module")
+def scratch_database():
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"no mongod reachable at {MONGO_URL}")
+    name = f"sports_club_registration_{uuid.uuid4().hex[:8]}"
+    previous = server.mongo.db_name
+    server.mongo.close()
+    server.mongo.db_name = name
+    yield name
+    server.mongo.close()
+    server.mongo.db_name = previous
+    client.drop_database(name)
+    client.close()
+
+
+async def _scenario():
+    await server.ensure_indexes()
+    event = server.Event(
+        title="Season opener", description="Sign-ups", event_date=server.datetime.now(),
+        location="Clubhouse", event_type="social", max_participants=CAPACITY,
+    )
+    await server.events_collection.insert_one(server.stamp_new(event))
+
+    async def register(member_id):
+        request = server.RegistrationRequest(member_id=member_id)
+        return await server.register_for_event(event.id, request)
+
+    members = [f"member-{i}" for i in range(MEMBERS)]
+    results = await asyncio.gather(*(register(member) for member in members))
+    registered = [r["member_id"] for r in results if r["status"] == server.REGISTERED]
+    waitlist = [
+        doc["member_id"]
+        async for doc in server.registrations_collection.find({"event_id": event.id, "status": server.WAITLISTED})
+        .sort([("created_at", 1), ("_id", 1)])
+    ]
+
+    # Registering again changes nothing.
+    again = await asyncio.gather(*(register(member) for member in members[:100]))
+
+    cancelled = registered[:10]
+    await asyncio.gather(*(
+        server.unregister_from_event(event.id, server.RegistrationRequest(member_id=member))
+        for member in cancelled
+    ))
+
+    stored = await server.events_collection.find_one({"id": event.id})
+    statuses = {
+        doc["member_id"]: doc["status"]
+        async for doc in server.registrations_collection.find({"event_id": event.id})
+    }
+    return results, registered, waitlist, again, cancelled, stored, statuses
+
+
+def test_concurrent_registration_never_overbooks(scratch_database):
+    results, registered, waitlist, again, cancelled, stored, statuses = asyncio.run(_scenario())
+    server.mongo.close()
+
+    assert len(registered) == CAPACITY
+    assert len(waitlist) == MEMBERS - CAPACITY
+    assert all(r["status"] in (server.REGISTERED, server.WAITLISTED) for r in results)
+    assert all(r["status"] in (server.REGISTERED, server.WAITLISTED) for r in again)
+
+    assert stored["current_participants"] == CAPACITY
+    assert sum(status == server.REGISTERED for status in statuses.values()) == CAPACITY
+    assert not set(cancelled) & set(statuses)
+    # The cancelled seats went to the head of the waitlist.
+    assert all(statuses[member] == server.REGISTERED for member in waitlist[:len(cancelled)])
+    assert all(statuses[member] == server.WAITLISTED for member in waitlist[len(cancelled):])
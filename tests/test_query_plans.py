@@ -0,0 +1,138 @@
+"""Query-plan checks for every endpoint query against a local mongod.
+
+Each query issued by server.py is explained against a scratch database that
+has the startup indexes applied; a plan that scans the whole collection or
+sorts in memory fails the test. Set MONGO_URL to point at the mongod to use.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import server
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+FORBIDDEN_STAGES = {"COLLSCAN", "SORT"}
+
+# (endpoint, collection, filter, sort). List endpoints are explained both for
+# the first page and for a later page reached through a keyset cursor.
+NOW = datetime.now()
+CURSOR_ID = str(uuid.uuid4())
+
+
+def _page(endpoint, collection, query, sort_field, direction):
+    cursor = server.encode_cursor({sort_field: NOW, "id": CURSOR_ID}, sort_field)
+    sort = [(sort_field, direction), ("id", direction)]
+    return [
+        (endpoint, collection, query, sort),
+        (f"{endpoint}(cursor)", collection, server.keyset_filter(query, sort_field, direction, cursor), sort),
+    ]
+
+
+QUERIES = [
+    ("get_team", "teams", {"id": "x"}, None),
+    ("update_team", "teams", {"id": "x"}, None),
+    ("delete_team", "teams", {"id": "x"}, None),
+    ("get_player", "players", {"id": "x"}, None),
+    ("update_player", "players", {"id": "x"}, None),
+    ("get_match", "matches", {"id": "x"}, None),
+    ("update_match", "matches", {"id": "x"}, None),
+    *_page("get_teams", "teams", {}, "created_at", 1),
+    *_page("get_players", "players", {}, "created_at", 1),
+    *_page("get_players(team_id)", "players", {"team_id": "x"}, "created_at", 1),
+    *_page("get_matches", "matches", {}, "match_date", -1),
+    *_page("get_matches(team_id)", "matches", server.team_matches_query("x"), "match_date", -1),
+    *_page("get_matches(season)", "matches", {"season": "2025"}, "match_date", -1),
+    *_page("get_matches(team_id, season)", "matches", server.team_matches_query("x", season="2025"), "match_date", -1),
+    *_page("get_matches(closed season)", "matches_archive", {"season": "2023"}, "match_date", -1),
+    *_page("get_matches(team_id, closed season)", "matches_archive", server.team_matches_query("x", season="2023"), "match_date", -1),
+    ("find_match:archive", "matches_archive", {"id": "x"}, None),
+    ("close_season:unfinished", "matches", {"season": "2023", "status": {"$in": ["scheduled", "live"]}}, None),
+    *_page("get_team_overview:roster", "players", {"team_id": "x", "is_active": True}, "created_at", 1),
+    *_page("get_team_overview:results", "matches", server.team_matches_query("x", status="completed"), "match_date", -1),
+    *_page("get_team_overview:fixtures", "matches", server.team_matches_query("x", status={"$in": ["scheduled", "live"]}, match_date={"$gte": NOW}), "match_date", 1),
+    *_page("get_events", "events", {}, "event_date", 1),
+    *_page("get_news", "news", {"published": True}, "created_at", -1),
+    *_page("get_news(published_only=false)", "news", {}, "created_at", -1),
+    *_page("get_news(archived)", "news_archive", {"published": True}, "created_at", -1),
+    *_page("get_sponsors", "sponsors", {"active": True}, "created_at", 1),
+    *_page("get_sponsors(active_only=false)", "sponsors", {}, "created_at", 1),
+    ("get_standings", "standings", {"season": "2025", "competition": "League"}, None),
+    ("reconcile_stats:players", "players", {"is_active": True}, None),
+    ("reconcile_stats:news", "news", {"published": True}, None),
+    ("count_upcoming_matches", "matches", {"status": "scheduled", "match_date": {"$gte": NOW}}, None),
+    ("count_upcoming_matches:next_kickoff", "matches", {"status": "scheduled", "match_date": {"$gte": NOW}}, [("match_date", 1)]),
+    ("get_team_calendar", "matches", server.team_matches_query("x", match_date={"$gte": NOW, "$lt": NOW + timedelta(days=365)}), [("match_date", 1), ("id", 1)]),
+    ("register_for_event", "event_registrations", {"event_id": "x", "member_id": "m"}, None),
+    ("promote_waitlist", "event_registrations", {"event_id": "x", "status": "waitlisted"}, [("created_at", 1), ("_id", 1)]),
+    ("waitlist_position", "event_registrations", {"event_id": "x", "status": "waitlisted", "created_at": {"$lt": NOW}}, None),
+    ("JobQueue:claim", "jobs", {"status": "pending", "run_at": {"$lte": NOW}}, [("run_at", 1)]),
+    ("JobQueue:reclaim_expired", "jobs", {"status": "running", "lease_until": {"$lte": NOW}}, None),
+    ("schedule_pending_publications", "news", {"published": False, "published_at": {"$ne": None}}, None),
+    ("get_events_calendar", "events", {"is_public": True, "event_date": {"$gte": NOW, "$lt": NOW + timedelta(days=365)}}, [("event_date", 1), ("id", 1)]),
+]
+
+
+def _seed(database):
+    for i in range(50):
+        team_id = str(uuid.uuid4())
+        database.teams.insert_one({"id": team_id, "name": f"Team {i}", "created_at": NOW})
+        database.players.insert_one({"id": str(uuid.uuid4()), "team_id": team_id, "is_active": i % 2 == 0, "created_at": NOW})
+        database.matches.insert_one({
+            "id": str(uuid.uuid4()),
+            "status": "scheduled" if i % 2 else "completed",
+            "match_date": NOW + timedelta(days=i - 25),
+            "created_at": NOW,
+        })
+        database.events.insert_one({"id": str(uuid.uuid4()), "event_date": NOW + timedelta(days=i), "created_at": NOW})
+        database.news.insert_one({"id": str(uuid.uuid4()), "published": i % 3 == 0, "created_at": NOW - timedelta(hours=i)})
+        database.sponsors.insert_one({"id": str(uuid.uuid4()), "active": i % 4 != 0, "created_at": NOW})
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+@pytest.fixture(scope="module")
+def database():
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"no mongod reachable at {MONGO_URL}")
+    name = f"sports_club_plans_{uuid.uuid4().hex[:8]}"
+    database = client[name]
+    for collection, indexes in {**server.COLLECTION_INDEXES, **server.SHARED_COLLECTION_INDEXES}.items():
+        database[collection].create_indexes(indexes)
+    _seed(database)
+    yield database
+    client.drop_database(name)
+    client.close()
+
+
+@pytest.mark.parametrize("endpoint,collection,query,sort", QUERIES, ids=[q[0] for q in QUERIES])
+def test_query_uses_index(database, endpoint, collection, query, sort):
+    cursor = database[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    stages = set(_stages(plan))
+    assert not stages & FORBIDDEN_STAGES, f"{endpoint} plan uses {sorted(stages & FORBIDDEN_STAGES)}: {plan}"
+
+
+def test_every_entity_collection_has_unique_id_index():
+    for collection in ("teams", "players", "matches", "events", "news", "sponsors"):
+        assert any(
+            index.document["key"] == {"id": 1} and index.document.get("unique")
+            for index in server.COLLECTION_INDEXES[collection]
+        ), collection
@@ -0,0 +1,60 @@
+import random
+
+from standings import DEFAULT_POINT_SYSTEMS, STAT_FIELDS, compute_standings, rank_table, standings_delta
+
+TEAMS = [(f"team-{i}", f"Team {i}") for i in range(6)]
+
+
+def _match(rng, match_id):
+    (home_id, home_name), (away_id, away_name) = rng.sample(TEAMS, 2)
+    return {
+        "id": match_id,
+        "home_team_id": home_id,
+        "away_team_id": away_id,
+        "home_team_name": home_name,
+        "away_team_name": away_name,
+        "sport": "football",
+        "season": rng.choice(["2024", "2025"]),
+        "competition": "League",
+        "status": "scheduled",
+        "home_score": None,
+        "away_score": None,
+    }
+
+
+def _apply(table, delta):
+    for key, entry in delta.items():
+        row = table.setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+        for field, value in entry["inc"].items():
+            row[field] += value
+        if row["played"] <= 0:
+            del table[key]
+
+
+def test_incremental_updates_match_full_rebuild():
+    rng = random.Random(7)
+    matches = {}
+    table = {}
+    for step in range(500):
+        match_id = rng.randrange(60)
+        before = matches.get(match_id)
+        after = dict(before) if before else _match(rng, match_id)
+        after["status"] = rng.choice(["scheduled", "live", "completed", "completed", "cancelled"])
+        if after["status"] in ("live", "completed"):
+            after["home_score"], after["away_score"] = rng.randrange(5), rng.randrange(5)
+        matches[match_id] = after
+        _apply(table, standings_delta([(before, after)]))
+
+    rebuilt = {key: {field: row[field] for field in STAT_FIELDS} for key, row in compute_standings(matches.values()).items()}
+    assert table == rebuilt
+
+
+def test_rank_table_uses_sport_point_system():
+    rows = [
+        {"team_id": "a", "team_name": "A", "sport": "football", "played": 2, "won": 1, "drawn": 1, "lost": 0, "goals_for": 3, "goals_against": 1},
+        {"team_id": "b", "team_name": "B", "sport": "football", "played": 2, "won": 1, "drawn": 0, "lost": 1, "goals_for": 5, "goals_against": 2},
+    ]
+    table = rank_table(rows, DEFAULT_POINT_SYSTEMS)
+    assert [(row["team_id"], row["points"], row["position"]) for row in table] == [("a", 4, 1), ("b", 3, 2)]
+    table = rank_table(rows, {"football": {"win": 2, "draw": 0, "loss": 0}})
+    assert [(row["team_id"], row["goal_difference"]) for row in table] == [("b", 3), ("a", 2)]
@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from pymongo.errors import AutoReconnect
+from pymongo.results import UpdateResult
+
+from tasks import JobQueue
+
+
+async def _drain(queue, until, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not until() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_failing_job_is_retried_with_backoff_then_failed():
+    async def scenario():
+        queue = JobQueue(workers=2, max_attempts=3, backoff=0.02)
+        attempts = []
+
+        @queue.task("flaky")
+        async def flaky(value):
+            attempts.append(datetime.now())
+            raise RuntimeError(value)
+
+        await queue.start()
+        await queue.enqueue("flaky", {"value": "boom"})
+        await _drain(queue, lambda: queue.totals["failed"])
+        await queue.stop()
+        return attempts, await queue.stats()
+
+    attempts, stats = asyncio.run(scenario())
+    assert len(attempts) == 3
+    gaps = [(later - earlier).total_seconds() for earlier, later in zip(attempts, attempts[1:])]
+    assert gaps[0] >= 0.02 and gaps[1] >= 0.04
+    assert stats["failed"] == 1
+    assert stats["totals"] == {"enqueued": 1, "completed": 0, "retried": 2, "failed": 1}
+
+
+def test_keyed_jobs_replace_each_other_and_run_when_due():
+    async def scenario():
+        queue = JobQueue(workers=4)
+        runs = []
+
+        @queue.task("publish")
+        async def publish(article_id, version):
+            runs.append((article_id, version, datetime.now()))
+
+        await queue.start()
+        soon = datetime.now() + timedelta(milliseconds=100)
+        await queue.enqueue("publish", {"article_id": "a", "version": 1}, run_at=soon, key="publish:a")
+        await queue.enqueue("publish", {"article_id": "a", "version": 2}, run_at=soon, key="publish:a")
+        await queue.enqueue("publish", {"article_id": "b", "version": 1}, key="publish:b")
+        scheduled = await queue.stats()
+        await _drain(queue, lambda: len(runs) == 2)
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        return runs, soon, scheduled
+
+    runs, soon, scheduled = asyncio.run(scenario())
+    assert scheduled["scheduled"] == 1
+    assert [(article_id, version) for article_id, version, _ in runs] == [("b", 1), ("a", 2)]
+    assert runs[1][2] >= soon
+
+
+class FlakyJobs:
+    """Just enough of a Motor collection for durable mode, whose first claims and
+    first delete raise like a dropped connection."""
+
+    def __init__(self, claim_failures, delete_failures):
+        self.claim_failures = claim_failures
+        self.delete_failures = delete_failures
+        self.jobs = {}
+
+    async def insert_one(self, job):
+        self.jobs[job["_id"]] = job
+
+    async def find_one_and_update(self, query, update, **kwargs):
+        if self.claim_failures:
+            self.claim_failures -= 1
+            raise AutoReconnect("connection reset")
+        for job in sorted(self.jobs.values(), key=lambda job: job["run_at"]):
+            if job["status"] == query["status"] and job["run_at"] <= query["run_at"]["$lte"]:
+                job.update(update["$set"])
+                return dict(job)
+        return None
+
+    async def delete_one(self, query):
+        if self.delete_failures:
+            self.delete_failures -= 1
+            raise AutoReconnect("connection reset")
+        self.jobs.pop(query["_id"], None)
+
+    async def update_many(self, query, update):
+        expired = [
+            job for job in self.jobs.values()
+            if job["status"] == query["status"] and job["lease_until"] <= query["lease_until"]["$lte"]
+        ]
+        for job in expired:
+            job.update(update["$set"])
+            del job["lease_until"]
+        return UpdateResult({"nModified": len(expired)}, True)
+
+
+def test_durable_workers_survive_transient_database_errors():
+    async def scenario():
+        jobs = FlakyJobs(claim_failures=4, delete_failures=1)
+        queue = JobQueue(jobs, workers=2, poll_interval=0.01, lease=0.1)
+        runs = []
+
+        @queue.task("note")
+        async def note(value):
+            runs.append(value)
+
+        await queue.start()
+        for value in range(3):
+            await queue.enqueue("note", {"value": value})
+        await _drain(queue, lambda: not jobs.jobs)
+        alive = sum(not task.done() for task in queue._tasks)
+        await queue.stop()
+        return jobs, runs, alive
+
+    jobs, runs, alive = asyncio.run(scenario())
+    assert not jobs.jobs and not jobs.claim_failures and not jobs.delete_failures
+    # The job whose delete failed ran again once its lease expired.
+    assert sorted(set(runs)) == [0, 1, 2] and len(runs) == 4
+    assert alive == 2